@@ -1,6 +1,18 @@
+import argparse
 import pandas as pd
 import os
 import json
+from utils.species_utils import (
+    load_species_map,
+    build_species_to_taxon,
+    add_subset_arguments,
+    normalize_taxa,
+    normalize_databases,
+    subset_output_path
+)
+
+INPUT_DIRECTORY = "data/raw/GeneDescriptions"
+OUTPUT_DIRECTORY = "data/processed/GeneDescriptions"
 
 def process_description_file(filepath):
     """Process a single gene description TSV file."""
@@ -42,23 +54,42 @@ def process_description_file(filepath):
     
     return df
 
-def combine_descriptions(input_dir, output_dir):
-    """Combine all gene description files in the directory."""
+def build_gene_nodes(input_dir, taxa=None, databases=None):
+    """
+    Combine all gene description files in the directory in memory.
+
+    taxa skips whole description files of other species; databases keeps
+    only rows of those (standardized) databases.
+
+    Returns:
+        tuple: (combined gene nodes DataFrame, metadata dict with databases and species)
+    """
     all_data = []
     metadata = {}
     species_set = set()  # New set to collect species
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+    species_to_taxon = build_species_to_taxon(load_species_map()) if taxa is not None else {}
     
-    # Process each TSV file in the directory
-    for filename in os.listdir(input_dir):
+    # Process each TSV file in the directory, in sorted order so gene_nodes.csv row order
+    # (and the node IDs export_graph.py derives from it) is the same on every filesystem
+    for filename in sorted(os.listdir(input_dir)):
         if filename.startswith('GENE-DESCRIPTION-TSV_') and filename.endswith('.tsv'):
             # Extract species from filename
             species = filename.split('_')[-1].split('.')[0].lower()
+            if taxa is not None and species_to_taxon.get(species) not in taxa:
+                continue
             species_set.add(species)
             
             filepath = os.path.join(input_dir, filename)
             df = process_description_file(filepath)
+            if databases is not None:
+                df = df[df['database'].isin(databases)]
             all_data.append(df)
     
+    if not all_data:
+        raise ValueError(f"No gene description files in {input_dir} match the requested subset")
+    
     # Combine all dataframes
     combined_df = pd.concat(all_data, ignore_index=True)
     
@@ -71,23 +102,39 @@ def combine_descriptions(input_dir, output_dir):
     metadata['databases'] = unique_databases
     metadata['species'] = unique_species  # Add species to metadata
     
+    # Clean descriptions
+    combined_df['Description'] = combined_df['Description'].str.replace('"', "'")
+    
+    return combined_df, metadata
+
+def write_gene_nodes(combined_df, metadata, output_dir):
+    """Write gene_nodes.csv and species_metadata.json to output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
     # Save metadata to JSON file
     metadata_file = os.path.join(output_dir, 'species_metadata.json')
     with open(metadata_file, 'w') as f:
         json.dump(metadata, f, indent=2)
     print(f"\nMetadata saved to: {metadata_file}")
     
-    # Clean descriptions
-    combined_df['Description'] = combined_df['Description'].str.replace('"', "'")
-    
     # Create output CSV file
     output_file = os.path.join(output_dir, 'gene_nodes.csv')
     combined_df.to_csv(output_file, index=False, quoting=1)
     
     return output_file
 
+def combine_descriptions(input_dir, output_dir, taxa=None, databases=None):
+    """
+    Combine all gene description files in the directory.
+
+    Subset runs write to the subset directory of output_dir (see subset_output_path()).
+    """
+    combined_df, metadata = build_gene_nodes(input_dir, taxa, databases)
+    return write_gene_nodes(combined_df, metadata, subset_output_path(output_dir, taxa, databases))
+
 # Usage
-input_directory = "data/raw/GeneDescriptions"
-output_directory = "data/processed/GeneDescriptions"
-output_file = combine_descriptions(input_directory, output_directory)
-print(f"\nCombined descriptions saved to: {output_file}")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine gene description files into gene_nodes.csv")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+    output_file = combine_descriptions(INPUT_DIRECTORY, OUTPUT_DIRECTORY, args.taxa, args.databases)
+    print(f"\nCombined descriptions saved to: {output_file}")
\ No newline at end of file
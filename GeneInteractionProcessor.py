@@ -1,15 +1,28 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import numpy as np
 import json
 from pathlib import Path
+from functools import lru_cache
 from utils.species_utils import (
     load_species_map, 
     get_species_name, 
     get_species_db_name,
     get_species_shortname,
-    get_valid_databases,
-    is_valid_database
+    add_subset_arguments,
+    normalize_taxa,
+    normalize_databases,
+    subset_input_path,
+    subset_output_path
 )
-from typing import Dict
+from resolve_synonyms import resolve_synonyms
+from mitab_index import MitabIndexBuilder, MitabRowOffsets, default_index_dir
+from typing import Dict, List, Optional, Set
 
 # Define constants
 RAW_DIR = Path('data/raw/GeneticInteractions')
@@ -19,13 +32,35 @@ OUTPUT_FILE = PROCESSED_DIR / 'extracted_genetic_interactions.csv'
 METADATA_FILE = PROCESSED_DIR / 'species_metadata.json'
 SYNONYMS_FILE = Path('data/processed/gene_synonyms.json')
 
+# Rows per chunk handed to the transform step
+CHUNK_SIZE = 10000
+
+# Maximum raw/in-flight chunks held by the pipelined mode before the reader blocks
+PIPELINE_QUEUE_SIZE = 8
+
+# Number of example interactions recorded per (taxon, database) in the metadata
+EXAMPLES_PER_DATABASE = 5
+
+EDGE_KEY_COLS = ['database', 'taxonId', 'fromGeneId', 'toGeneId']
+
+# Columns identifying an edge for --dedup. database is left out: process_chunk takes it from
+# interactor B only, so A-B and B-A rows of one pair can carry different databases.
+DEDUP_KEY_COLS = ['taxonId', 'fromGeneId', 'toGeneId']
+
 INTERACTOR_COLS = [
     'ID(s) interactor A', 'ID(s) interactor B',
     'Taxid interactor A', 'Taxid interactor B'
 ]
 
-# Load species map from config file
-SPECIES_MAP = load_species_map()
+@lru_cache(maxsize=None)
+def get_species_map() -> Dict[str, Dict[str, str]]:
+    """Load the species map from the config file on first use."""
+    return load_species_map()
+
+@lru_cache(maxsize=None)
+def get_valid_database_set() -> Set[str]:
+    """Database short names from the species map, loaded on first use."""
+    return {species_info['db_name'] for species_info in get_species_map().values()}
 
 class DataValidationError(Exception):
     """Custom exception for data validation errors."""
@@ -66,9 +101,6 @@ def validate_species_data(species_map: Dict[str, Dict[str, str]], taxon_id: str)
         if field not in species_data:
             raise DataValidationError(f"No {field} found for taxon ID: {taxon_id}")
 
-# Replace hardcoded VALID_DATABASES with function call
-VALID_DATABASES = set(get_valid_databases())
-
 # 1. Move database aliases to constants at module level
 DATABASE_ALIASES = {
     'entrez': {'entrezgene', 'entrez gene/locuslink', 'geneid', 'gene/locuslink'},
@@ -83,9 +115,9 @@ def get_remapped_database(database: str, taxon_id: str) -> str:
         return ''
     
     database = database.lower()
-    species_db = get_species_db_name(SPECIES_MAP, taxon_id)
+    species_db = get_species_db_name(get_species_map(), taxon_id)
     
-    if species_db != 'unknown' and is_valid_database(species_db):
+    if species_db != 'unknown' and species_db in get_valid_database_set():
         # Check if database matches any aliases for the species_db
         if database in DATABASE_ALIASES.get(species_db, set()):
             return species_db
@@ -115,30 +147,396 @@ def split_gene_id(gene_id: str, taxon_id: str = '') -> tuple:
     
     return (database, gene_id)
 
-def load_gene_synonyms():
+def load_gene_synonyms(synonyms_file=SYNONYMS_FILE):
     """Load gene synonyms from JSON file."""
     try:
-        with open(SYNONYMS_FILE) as f:
+        with open(synonyms_file) as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Warning: Gene synonyms file not found at {SYNONYMS_FILE}")
+        print(f"Warning: Gene synonyms file not found at {synonyms_file}")
         return {}
 
-def map_gene_id(gene_id: str, taxon_id: str, gene_synonyms: dict) -> str:
-    """Map gene ID to canonical form using synonyms dictionary."""
-    if not taxon_id or taxon_id not in gene_synonyms:
+def map_gene_id(gene_id: str, taxon_id: str, synonym_maps: dict) -> str:
+    """Map gene ID to canonical form using the resolved synonym -> representative maps."""
+    taxon_map = synonym_maps.get(taxon_id)
+    if not taxon_map:
         return gene_id
-        
-    # Look through all genes in this taxon
-    for canonical_id, synonyms in gene_synonyms[taxon_id].items():
-        if gene_id in synonyms:
-            return canonical_id
-    return gene_id
-
-def main():
-    # Load gene synonyms at start of main
-    gene_synonyms = load_gene_synonyms()
-    
+    return taxon_map.get(gene_id, gene_id)
+
+def read_interaction_chunks(chunk_size: int = CHUNK_SIZE, taxa: Optional[Set[str]] = None,
+                            indexer: Optional[MitabIndexBuilder] = None):
+    """
+    Iterate over the interactor columns of the input file in chunks.
+
+    With a taxa filter, each chunk is reduced to the matching taxon IDs as soon
+    as it is read, before any gene ID parsing; chunks left empty are skipped.
+    With an indexer, the byte offsets of the rows come from one vectorized
+    newline scan of the memory-mapped file (see MitabRowOffsets), and the
+    interactors of every kept row are added to the indexer.
+    """
+    reader = pd.read_csv(
+        INPUT_FILE,
+        sep='\t',
+        comment='#',
+        usecols=INTERACTOR_COLS,
+        chunksize=chunk_size
+    )
+    row_offsets = MitabRowOffsets(INPUT_FILE) if indexer is not None else None
+    completed = False
+    try:
+        for chunk in reader:
+            offsets = row_offsets.take(chunk['ID(s) interactor A']) if row_offsets is not None else None
+            if taxa is not None:
+                keep = extract_taxon_ids(chunk).isin(taxa).to_numpy()
+                chunk = chunk[keep]
+                if offsets is not None:
+                    offsets = offsets[keep]
+            if indexer is not None:
+                indexer.add_many(offsets, chunk['ID(s) interactor A'], chunk['Taxid interactor A'])
+                indexer.add_many(offsets, chunk['ID(s) interactor B'], chunk['Taxid interactor B'])
+            if chunk.empty:
+                continue
+            yield chunk
+        completed = True
+    finally:
+        if row_offsets is not None:
+            row_offsets.close(check=completed)
+
+def extract_taxon_ids(chunk: pd.DataFrame) -> pd.Series:
+    """Extract interactor A taxon IDs from a chunk of raw interactions."""
+    return chunk['Taxid interactor A'].str.extract(r'taxid:(\d+)', expand=False)
+
+def process_chunk(chunk: pd.DataFrame, synonym_maps: dict,
+                  databases: Optional[Set[str]] = None) -> pd.DataFrame:
+    """
+    Split, remap and synonym-map the gene IDs of one chunk of raw interactions.
+
+    Args:
+        chunk: Raw rows with the INTERACTOR_COLS columns
+        synonym_maps: Resolved synonym -> representative maps keyed by taxon ID
+        databases: If given, rows of other (remapped) databases are dropped
+            before synonym mapping
+
+    Returns:
+        pd.DataFrame: database, taxonId, fromGeneId and toGeneId columns
+    """
+    chunk = chunk.copy()
+
+    # Extract taxon ID and process gene IDs
+    chunk['taxonId'] = extract_taxon_ids(chunk)
+
+    # Process gene IDs and look up synonyms
+    chunk[['database', 'fromGeneId']] = pd.DataFrame(
+        [split_gene_id(x, t) for x, t in zip(chunk['ID(s) interactor A'], chunk['taxonId'])],
+        index=chunk.index
+    )
+
+    chunk[['database', 'toGeneId']] = pd.DataFrame(
+        [split_gene_id(x, t) for x, t in zip(chunk['ID(s) interactor B'], chunk['taxonId'])],
+        index=chunk.index
+    )
+
+    if databases is not None:
+        chunk = chunk[chunk['database'].isin(databases)]
+
+    # Map gene IDs using synonyms with taxon ID
+    chunk['fromGeneId'] = [
+        map_gene_id(g, t, synonym_maps) for g, t in zip(chunk['fromGeneId'], chunk['taxonId'])
+    ]
+    chunk['toGeneId'] = [
+        map_gene_id(g, t, synonym_maps) for g, t in zip(chunk['toGeneId'], chunk['taxonId'])
+    ]
+
+    return chunk[EDGE_KEY_COLS]
+
+def concat_processed_chunks(processed_chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """Combine processed chunks, allowing for a subset filter that matched nothing."""
+    if not processed_chunks:
+        return pd.DataFrame(columns=EDGE_KEY_COLS)
+    return pd.concat(processed_chunks, ignore_index=True)
+
+def process_sequential(synonym_maps: dict,
+                       chunk_size: int = CHUNK_SIZE,
+                       taxa: Optional[Set[str]] = None,
+                       databases: Optional[Set[str]] = None,
+                       indexer: Optional[MitabIndexBuilder] = None,
+                       sink=None) -> pd.DataFrame:
+    """
+    Read and transform the input file one chunk at a time on the main thread.
+
+    sink, if given, is called with every processed chunk in input order and
+    its return value is kept instead (see process_interactions()).
+    """
+    processed_chunks = []
+    for chunk in read_interaction_chunks(chunk_size, taxa, indexer):
+        processed = process_chunk(chunk, synonym_maps, databases)
+        processed_chunks.append(sink(processed) if sink is not None else processed)
+    return concat_processed_chunks(processed_chunks)
+
+# Synonym maps and database filter installed once per worker process by _init_worker
+_worker_synonym_maps = None
+_worker_databases = None
+
+# Sentinel marking the end of a pipeline queue
+_END_OF_STREAM = object()
+
+def _init_worker(synonym_maps: dict, databases: Optional[Set[str]]) -> None:
+    global _worker_synonym_maps, _worker_databases
+    _worker_synonym_maps = synonym_maps
+    _worker_databases = databases
+
+def _process_chunk_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    return process_chunk(chunk, _worker_synonym_maps, _worker_databases)
+
+def process_pipelined(synonym_maps: dict,
+                      chunk_size: int = CHUNK_SIZE,
+                      workers: int = None,
+                      queue_size: int = PIPELINE_QUEUE_SIZE,
+                      taxa: Optional[Set[str]] = None,
+                      databases: Optional[Set[str]] = None,
+                      indexer: Optional[MitabIndexBuilder] = None,
+                      sink=None) -> pd.DataFrame:
+    """
+    Read, transform and write chunks concurrently.
+
+    A reader thread parses raw chunks into a bounded queue, the main thread
+    submits them to a process pool, and a writer thread takes finished
+    chunks in submission order and passes them to sink, which validates and
+    appends them to the output while later chunks are still being
+    transformed. Both queues are bounded, so a slow stage throttles the ones
+    before it. The result is identical to process_sequential().
+
+    Worker processes are spawned rather than forked, since the reader and
+    writer threads are already running when the pool starts them.
+
+    Args:
+        synonym_maps: Resolved synonym -> representative maps keyed by taxon ID
+        chunk_size: Rows per chunk
+        workers: Number of worker processes (defaults to all CPUs)
+        queue_size: Maximum chunks buffered between stages
+        taxa: Only process interactions of these taxon IDs
+        databases: Only process interactions of these databases
+        indexer: Records row byte offsets in the reader thread
+        sink: Called in the writer thread with every processed chunk in input
+            order; its return value is kept instead of the chunk
+
+    Returns:
+        pd.DataFrame: Processed interactions in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    raw_chunks = queue.Queue(maxsize=queue_size)
+    pending = queue.Queue(maxsize=queue_size)
+    processed_chunks = []
+    errors = []
+
+    def reader():
+        try:
+            for chunk in read_interaction_chunks(chunk_size, taxa, indexer):
+                raw_chunks.put(chunk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            raw_chunks.put(_END_OF_STREAM)
+
+    def writer():
+        while True:
+            future = pending.get()
+            if future is _END_OF_STREAM:
+                break
+            if errors:
+                # Keep draining so the dispatcher never blocks on a full queue
+                future.cancel()
+                continue
+            try:
+                processed = future.result()
+                processed_chunks.append(sink(processed) if sink is not None else processed)
+            except Exception as e:
+                errors.append(e)
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(synonym_maps, databases)) as pool:
+        reader_thread = threading.Thread(target=reader, name='interaction-reader', daemon=True)
+        writer_thread = threading.Thread(target=writer, name='interaction-writer', daemon=True)
+        reader_thread.start()
+        writer_thread.start()
+
+        while True:
+            chunk = raw_chunks.get()
+            if chunk is _END_OF_STREAM:
+                break
+            if errors:
+                continue
+            pending.put(pool.submit(_process_chunk_in_worker, chunk))
+
+        pending.put(_END_OF_STREAM)
+        reader_thread.join()
+        writer_thread.join()
+
+    if errors:
+        raise errors[0]
+    return concat_processed_chunks(processed_chunks)
+
+def deduplicate_interactions(interactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse repeated gene pairs into single edges with an evidence count.
+
+    Each pair is ordered canonically (smaller gene ID first) so that A-B and
+    B-A rows collapse together. Rows are keyed by a 64-bit hash of
+    (taxonId, fromGeneId, toGeneId), which keeps the seen-set to 8 bytes per
+    row instead of three Python strings. Each edge keeps the database of its
+    first-seen row.
+
+    Args:
+        interactions: DataFrame with database, taxonId, fromGeneId, toGeneId
+
+    Returns:
+        pd.DataFrame: One row per distinct edge, in first-seen order, with an
+        added evidenceCount column
+    """
+    edges = interactions[EDGE_KEY_COLS].copy()
+
+    # Order each pair canonically so A-B and B-A share one key
+    from_ids = edges['fromGeneId'].astype(str)
+    to_ids = edges['toGeneId'].astype(str)
+    swap = (from_ids > to_ids).to_numpy()
+    edges['fromGeneId'] = np.where(swap, to_ids, from_ids)
+    edges['toGeneId'] = np.where(swap, from_ids, to_ids)
+
+    edge_hash = pd.util.hash_pandas_object(edges[DEDUP_KEY_COLS], index=False)
+    evidence_counts = edge_hash.value_counts(sort=False)
+    first_seen = ~edge_hash.duplicated()
+
+    deduplicated = edges[first_seen.to_numpy()].copy()
+    deduplicated['evidenceCount'] = edge_hash[first_seen].map(evidence_counts).to_numpy()
+    return deduplicated.reset_index(drop=True)
+
+def find_invalid_taxons(taxon_ids, species_map: Dict[str, Dict[str, str]]) -> List[str]:
+    """
+    Check each distinct taxon ID once against the species map.
+
+    Args:
+        taxon_ids: Distinct taxon IDs found in the interactions
+        species_map: Dictionary of species information
+
+    Returns:
+        List[str]: Taxon IDs that are missing or incomplete in the species map
+    """
+    invalid_taxons = []
+    for taxon_id in taxon_ids:
+        if pd.isna(taxon_id):  # Skip NA values
+            continue
+        try:
+            validate_taxon_id(taxon_id, species_map)
+            validate_species_data(species_map, taxon_id)
+        except DataValidationError as e:
+            print(f"Warning: {e}")
+            invalid_taxons.append(taxon_id)
+    return invalid_taxons
+
+def drop_invalid_taxa(chunk: pd.DataFrame, species_map: Dict[str, Dict[str, str]],
+                      taxon_status: Dict[Optional[str], bool]) -> pd.DataFrame:
+    """
+    Drop the rows of taxon IDs that are missing or incomplete in the species map.
+
+    taxon_status caches the verdict per taxon ID across chunks, so each taxon
+    is checked and warned about once per run. Rows without a taxon ID are
+    kept and recorded under the None key.
+
+    Returns:
+        pd.DataFrame: The chunk without rows of invalid taxa
+    """
+    taxon_ids = chunk['taxonId']
+    new_taxa = [taxon_id for taxon_id in taxon_ids.dropna().unique() if taxon_id not in taxon_status]
+    invalid_taxa = set(find_invalid_taxons(new_taxa, species_map))
+    for taxon_id in new_taxa:
+        taxon_status[taxon_id] = taxon_id not in invalid_taxa
+    if taxon_ids.isna().any():
+        taxon_status.setdefault(None, True)
+
+    invalid_taxa = [taxon_id for taxon_id, valid in taxon_status.items() if not valid]
+    if not invalid_taxa:
+        return chunk
+    return chunk[~taxon_ids.isin(invalid_taxa)]
+
+def collect_species_metadata(interactions: pd.DataFrame,
+                             examples_per_database: int = EXAMPLES_PER_DATABASE) -> Dict[str, dict]:
+    """
+    Build per-species metadata with example interactions in one grouped pass.
+
+    Args:
+        interactions: Processed interactions with valid taxon IDs
+        examples_per_database: Number of examples kept per (taxon, database)
+
+    Returns:
+        Dict[str, dict]: Species information and examples keyed by taxon ID
+    """
+    species_map = get_species_map()
+    species_data_dict = {
+        taxon_id: {
+            'name': get_species_name(species_map, taxon_id),
+            'db_name': get_species_db_name(species_map, taxon_id),
+            'shortname': get_species_shortname(species_map, taxon_id),
+            'examples': {}
+        }
+        for taxon_id in interactions['taxonId'].dropna().unique()
+    }
+
+    # First N rows of every (taxon, database) group with a recognised database
+    known_db_rows = interactions[interactions['database'].isin(get_valid_database_set())]
+    example_rows = known_db_rows.groupby(['taxonId', 'database'], sort=False).head(examples_per_database)
+    for (taxon_id, db), rows in example_rows.groupby(['taxonId', 'database'], sort=False):
+        species_data_dict[taxon_id]['examples'][db] = rows[['fromGeneId', 'toGeneId']].to_dict('records')
+
+    return species_data_dict
+
+def process_interactions(gene_synonyms: dict,
+                         dedup: bool = False,
+                         examples_per_database: int = EXAMPLES_PER_DATABASE,
+                         pipelined: bool = False,
+                         workers: int = None,
+                         chunk_size: int = CHUNK_SIZE,
+                         taxa=None,
+                         databases=None,
+                         build_index: bool = False,
+                         output_file=None):
+    """
+    Extract, map and validate genetic interactions in memory.
+
+    Every processed chunk is validated against the species map as soon as it
+    is ready. With output_file and without dedup (which needs the complete
+    set), each validated chunk is also appended to output_file right away;
+    in pipelined mode this overlaps the writes with the transforms. Rows go
+    to a '.partial' file that replaces output_file only once the run succeeds.
+
+    Args:
+        gene_synonyms: Gene synonyms dictionary keyed by taxon ID
+        dedup: Collapse duplicate gene pairs into one edge with an evidence count
+        examples_per_database: Number of examples kept per (taxon, database) in the metadata
+        pipelined: Use the overlapped reader/worker/writer pipeline
+        workers: Worker processes for the pipelined mode
+        chunk_size: Rows per processing chunk
+        taxa: Only process interactions of these taxon IDs
+        databases: Only process interactions of these (remapped) databases
+        build_index: Record row byte offsets during the scan and save a MITAB index
+        output_file: CSV the rows are streamed to (ignored with dedup)
+
+    Returns:
+        tuple: (processed interactions DataFrame, metadata dict)
+    """
+    species_map = get_species_map()
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+    if taxa is not None:
+        gene_synonyms = {taxon_id: genes for taxon_id, genes in gene_synonyms.items() if taxon_id in taxa}
+
+    # Resolve synonyms into deterministic equivalence classes once, for O(1) lookups per ID
+    synonym_maps, synonym_conflicts = resolve_synonyms(gene_synonyms)
+    if len(synonym_conflicts):
+        print(f"Warning: {len(synonym_conflicts)} synonym classes merge several canonical IDs "
+              f"(run resolve_synonyms.py for the full report)")
+
     # Change set to list for JSON serialization
     metadata = {
         'species': {},
@@ -147,101 +545,52 @@ def main():
         'unmatched_databases': []  # Changed from set() to list
     }
 
-    # Read only required columns from the input file
-    genetic_interactions = pd.read_csv(
-        INPUT_FILE, 
-        sep='\t', 
-        comment='#', 
-        usecols=INTERACTOR_COLS
-    )
+    # Validate taxon IDs chunk by chunk and stream the rows out when no dedup is needed
+    taxon_status = {}
+    partial_file = Path(f'{output_file}.partial') if output_file is not None and not dedup else None
+    if partial_file is not None and partial_file.exists():
+        partial_file.unlink()
 
-    # Process data in chunks for better memory usage
-    chunk_size = 10000
-    processed_chunks = []
-    
-    for chunk_start in range(0, len(genetic_interactions), chunk_size):
-        chunk = genetic_interactions[chunk_start:chunk_start + chunk_size].copy()
-        
-        # Extract taxon ID and process gene IDs
-        chunk['taxonId'] = chunk['Taxid interactor A'].str.extract(r'taxid:(\d+)')
-        
-        # Process gene IDs and look up synonyms
-        chunk[['database', 'fromGeneId']] = pd.DataFrame(
-            [split_gene_id(x, t) for x, t in zip(chunk['ID(s) interactor A'], chunk['taxonId'])],
-            index=chunk.index
-        )
-        
-        chunk[['database', 'toGeneId']] = pd.DataFrame(
-            [split_gene_id(x, t) for x, t in zip(chunk['ID(s) interactor B'], chunk['taxonId'])],
-            index=chunk.index
-        )
-        
-        # Map gene IDs using synonyms with taxon ID
-        chunk['fromGeneId'] = chunk.apply(
-            lambda row: map_gene_id(row['fromGeneId'], row['taxonId'], gene_synonyms),
-            axis=1
-        )
-        
-        chunk['toGeneId'] = chunk.apply(
-            lambda row: map_gene_id(row['toGeneId'], row['taxonId'], gene_synonyms),
-            axis=1
-        )
-        
-        processed_chunks.append(chunk[['database', 'taxonId', 'fromGeneId', 'toGeneId']])
+    def finish_chunk(chunk):
+        chunk = drop_invalid_taxa(chunk, species_map, taxon_status)
+        if partial_file is not None and not chunk.empty:
+            chunk.to_csv(partial_file, mode='a', header=not partial_file.exists(), index=False)
+        return chunk
 
-    # Combine processed chunks
-    interactions_subset = pd.concat(processed_chunks, ignore_index=True)
+    # Read only required columns from the input file and process them in chunks
+    indexer = MitabIndexBuilder(INPUT_FILE) if build_index else None
+    if pipelined:
+        interactions_subset = process_pipelined(synonym_maps, chunk_size=chunk_size, workers=workers,
+                                                taxa=taxa, databases=databases, indexer=indexer,
+                                                sink=finish_chunk)
+    else:
+        interactions_subset = process_sequential(synonym_maps, chunk_size=chunk_size,
+                                                 taxa=taxa, databases=databases, indexer=indexer,
+                                                 sink=finish_chunk)
+    if indexer is not None:
+        indexer.save(subset_output_path(default_index_dir(INPUT_FILE), taxa, databases))
 
 
     # Display processed data
     print("\nProcessed data:")
     print(interactions_subset)
 
-    print(SPECIES_MAP)
+    print(species_map)
 
-    # Validate all taxon IDs exist in species map
-    unique_taxon_ids = interactions_subset['taxonId'].unique()
-    for taxon_id in unique_taxon_ids:
-        if pd.notna(taxon_id):  # Skip NA values
-            try:
-                validate_taxon_id(taxon_id, SPECIES_MAP)
-                validate_species_data(SPECIES_MAP, taxon_id)
-            except DataValidationError as e:
-                print(f"Warning: {e}")
-                metadata['invalid_taxons'].append(taxon_id)  # Track invalid taxons
-                interactions_subset = interactions_subset[interactions_subset['taxonId'] != taxon_id]
+    # Rows of taxa missing from the species map were already dropped chunk by chunk
+    unique_taxon_ids = list(taxon_status)
+    metadata['invalid_taxons'] = [taxon_id for taxon_id, valid in taxon_status.items() if not valid]
 
     # Ensure we still have valid data after filtering
     assert not interactions_subset.empty, "No valid interactions remaining after taxon ID validation"
 
-    # Optimize species processing
-    species_data_dict = {}
-    for taxon_id in interactions_subset['taxonId'].unique():
-        print(taxon_id)
-        if pd.isna(taxon_id):
-            continue
-            
-        species_data = interactions_subset[interactions_subset['taxonId'] == taxon_id]
-        all_databases = set(species_data['database'].unique())
-        valid_dbs = all_databases & VALID_DATABASES
-        
-        # Process examples more efficiently
-        examples = {
-            db: species_data[species_data['database'] == db]
-            .head(5)[['fromGeneId', 'toGeneId']]
-            .to_dict('records')
-            for db in valid_dbs
-            if not species_data[species_data['database'] == db].empty
-        }
-        
-        species_data_dict[taxon_id] = {
-            'name': get_species_name(SPECIES_MAP, taxon_id),
-            'db_name': get_species_db_name(SPECIES_MAP, taxon_id),
-            'shortname': get_species_shortname(SPECIES_MAP, taxon_id),
-            'examples': examples
-        }
+    # Collapse duplicate gene pairs (same pair from several publications, or A-B vs B-A)
+    raw_interaction_count = len(interactions_subset)
+    if dedup:
+        interactions_subset = deduplicate_interactions(interactions_subset)
+        print(f"\nDeduplicated {raw_interaction_count} interactions into {len(interactions_subset)} edges")
 
-    metadata['species'] = species_data_dict
+    metadata['species'] = collect_species_metadata(interactions_subset, examples_per_database)
 
     # Validate we have species data
     assert metadata['species'], "No valid species data found after validation"
@@ -252,7 +601,9 @@ def main():
         'valid_taxon_ids': len(metadata['species']),
         'invalid_taxon_ids': len(metadata['invalid_taxons']),
         'invalid_taxon_list': metadata['invalid_taxons'],  # Add list of invalid taxons
-        'processed_interactions': len(interactions_subset),
+        'processed_interactions': raw_interaction_count,
+        'unique_edges': len(interactions_subset) if dedup else None,
+        'ambiguous_synonym_classes': len(synonym_conflicts),
         'unmatched_databases': sorted(list(set(metadata['unmatched_databases'])))  # Deduplicate and sort
     }
 
@@ -278,17 +629,79 @@ def main():
     #         for ex in examples[:3]:  # Show first 3 examples
     #             print(f"  {ex['fromGeneId']} → {ex['toGeneId']}")
 
+    if partial_file is not None:
+        os.replace(partial_file, output_file)
+
+    return interactions_subset, metadata
+
+def write_interactions(interactions_subset: pd.DataFrame, metadata: dict,
+                       taxa=None, databases=None, write_rows: bool = True) -> None:
+    """
+    Write the extracted interactions and their metadata to the processed directory.
+
+    Subset runs write to the subset directory instead (see subset_output_path()).
+    write_rows is False when process_interactions() already streamed the rows.
+    """
     # Save metadata to JSON file
-    with open(METADATA_FILE, 'w') as f:
+    with open(subset_output_path(METADATA_FILE, taxa, databases), 'w') as f:
         json.dump(metadata, f, indent=2)
 
-
     # Save processed data
-    interactions_subset.to_csv(OUTPUT_FILE, index=False)
+    if write_rows:
+        interactions_subset.to_csv(subset_output_path(OUTPUT_FILE, taxa, databases), index=False)
+
+def main(dedup: bool = False,
+         examples_per_database: int = EXAMPLES_PER_DATABASE,
+         pipelined: bool = False,
+         workers: int = None,
+         chunk_size: int = CHUNK_SIZE,
+         taxa=None,
+         databases=None,
+         build_index: bool = False):
+    # Load gene synonyms at start of main, preferring those of an earlier subset run
+    gene_synonyms = load_gene_synonyms(subset_input_path(SYNONYMS_FILE, taxa, databases))
+    # Without dedup the rows are appended to the output as chunks finish
+    output_file = None if dedup else subset_output_path(OUTPUT_FILE, taxa, databases)
+
+    interactions_subset, metadata = process_interactions(
+        gene_synonyms,
+        dedup=dedup,
+        examples_per_database=examples_per_database,
+        pipelined=pipelined,
+        workers=workers,
+        chunk_size=chunk_size,
+        taxa=taxa,
+        databases=databases,
+        build_index=build_index,
+        output_file=output_file
+    )
+    write_interactions(interactions_subset, metadata, taxa, databases, write_rows=output_file is None)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract genetic interactions from MITAB data")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Collapse duplicate gene pairs into one edge with an evidenceCount column")
+    parser.add_argument('--examples', type=int, default=EXAMPLES_PER_DATABASE,
+                        help="Number of example interactions stored per taxon and database in the metadata")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Overlap reading, transforming and collecting chunks across threads and processes")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --pipeline (default: all CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Rows per processing chunk")
+    add_subset_arguments(parser)
+    parser.add_argument('--index', action='store_true',
+                        help="Also record byte offsets of every row for mitab_index.py lookups")
+    args = parser.parse_args()
     try:
-        main()
+        main(dedup=args.dedup,
+             examples_per_database=args.examples,
+             pipelined=args.pipeline,
+             workers=args.workers,
+             chunk_size=args.chunk_size,
+             taxa=args.taxa,
+             databases=args.databases,
+             build_index=args.index)
     except (AssertionError, DataValidationError) as e:
         print(f"Error: {e}")
         exit(1)
@@ -0,0 +1,273 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.stats import hypergeom
+from utils.species_utils import (
+    load_species_map,
+    add_subset_arguments,
+    get_subset_taxa,
+    subset_input_path,
+    subset_output_path
+)
+
+# Define constants
+DISEASE_FILE = Path('data/raw/Disease/DISEASE-ALLIANCE_COMBINED.tsv')
+VALID_INTERACTIONS_FILE = Path('data/processed/GeneticInteractions/valid_interactions.csv')
+OUTPUT_DIR = Path('data/processed/Enrichment')
+OUTPUT_FILE = OUTPUT_DIR / 'disease_module_enrichment.csv'
+
+DISEASE_COLS = ['Taxon', 'DBobjectType', 'DBObjectID', 'DOID', 'DOtermName']
+MODULE_TYPES = ['neighborhood', 'component']
+
+# Defaults for which diseases/modules are tested and which results are reported
+MIN_MODULE_SIZE = 3
+MIN_DISEASE_GENES = 2
+MAX_Q_VALUE = 0.05
+
+RESULT_COLS = [
+    'taxon_id', 'species_name', 'DOID', 'DOtermName', 'module', 'module_size',
+    'disease_genes', 'overlap', 'expected', 'fold_enrichment', 'p_value', 'q_value'
+]
+
+
+def load_disease_genes(species_map, taxa=None) -> pd.DataFrame:
+    """
+    Read gene-level disease associations as (taxonId, gene_key, DOID, DOtermName) rows.
+
+    Gene keys use the 'database:geneId:taxonId' form of valid_interactions.csv,
+    with the database taken from the species map where the taxon is known.
+    """
+    # Skip the header comments that start with #
+    with open(DISEASE_FILE, 'r') as f:
+        header_line = 0
+        for line in f:
+            if not line.startswith('#'):
+                break
+            header_line += 1
+
+    diseases = pd.read_csv(DISEASE_FILE, sep='\t', skiprows=header_line, usecols=DISEASE_COLS, dtype=str)
+    diseases = diseases[diseases['DBobjectType'].str.lower() == 'gene']
+
+    diseases['taxonId'] = diseases['Taxon'].str.split(':').str[-1]
+    if taxa is not None:
+        diseases = diseases[diseases['taxonId'].isin(taxa)]
+
+    id_parts = diseases['DBObjectID'].str.split(':', n=1, expand=True)
+    taxon_db_names = {taxon_id: info['db_name'] for taxon_id, info in species_map.items()}
+    db_names = diseases['taxonId'].map(taxon_db_names).fillna(id_parts[0]).str.lower()
+    diseases['gene_key'] = db_names + ':' + id_parts[1] + ':' + diseases['taxonId']
+
+    return diseases[['taxonId', 'gene_key', 'DOID', 'DOtermName']].dropna().drop_duplicates()
+
+
+def load_network_edges(taxa=None, edges_file=VALID_INTERACTIONS_FILE) -> pd.DataFrame:
+    """Read (taxonId, from_key, to_key) edges from valid_interactions.csv."""
+    edges = pd.read_csv(edges_file, usecols=['taxonId', 'from_key', 'to_key'], dtype=str)
+    if taxa is not None:
+        edges = edges[edges['taxonId'].isin(taxa)]
+    return edges
+
+
+def benjamini_hochberg(p_values: np.ndarray, n_tests: int) -> np.ndarray:
+    """
+    Benjamini-Hochberg adjusted p-values.
+
+    n_tests may exceed len(p_values): untested pairs (zero overlap) have p = 1
+    and never lower the adjusted value of a tested one.
+    """
+    if len(p_values) == 0:
+        return p_values
+    order = np.argsort(p_values)
+    ranked = p_values[order] * n_tests / np.arange(1, len(p_values) + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q_values = np.empty_like(ranked)
+    q_values[order] = np.minimum(ranked, 1.0)
+    return q_values
+
+
+def build_modules(adjacency: sparse.csr_matrix, module_type: str, node_keys: np.ndarray):
+    """
+    Build the gene x module membership matrix.
+
+    neighborhood: one module per gene, holding the gene and its direct interactors.
+    component: one module per connected component.
+
+    Returns:
+        tuple: (binary CSC membership matrix, module labels)
+    """
+    n_nodes = adjacency.shape[0]
+    if module_type == 'neighborhood':
+        membership = (adjacency + sparse.identity(n_nodes, format='csr')).astype(bool).tocsc()
+        return membership, node_keys
+    if module_type == 'component':
+        n_components, labels = connected_components(adjacency, directed=False)
+        membership = sparse.csc_matrix(
+            (np.ones(n_nodes, dtype=bool), (np.arange(n_nodes), labels)),
+            shape=(n_nodes, n_components)
+        )
+        return membership, np.array([f'component:{i}' for i in range(n_components)])
+    raise ValueError(f"Unknown module type: {module_type}")
+
+
+def enrich_species(taxon_id: str, species_name: str, edges: pd.DataFrame, diseases: pd.DataFrame,
+                   module_type: str = 'neighborhood',
+                   min_module_size: int = MIN_MODULE_SIZE,
+                   min_disease_genes: int = MIN_DISEASE_GENES,
+                   max_q_value: float = MAX_Q_VALUE) -> pd.DataFrame:
+    """
+    Test every disease against every module of one species' network in one batch.
+
+    The universe is the set of genes in the species network. Overlaps for all
+    disease x module pairs come from one sparse product, and the hypergeometric
+    tail probabilities of all non-zero overlaps are computed in one vectorized
+    call. Benjamini-Hochberg correction runs over all disease x module pairs of
+    the species.
+
+    Returns:
+        pd.DataFrame: Results with q_value <= max_q_value, columns RESULT_COLS
+    """
+    node_keys, node_index = np.unique(
+        np.concatenate([edges['from_key'].to_numpy(), edges['to_key'].to_numpy()]),
+        return_inverse=True
+    )
+    n_nodes = len(node_keys)
+    n_edges = len(edges)
+    sources, targets = node_index[:n_edges], node_index[n_edges:]
+    not_loop = sources != targets
+    sources, targets = sources[not_loop], targets[not_loop]
+
+    # Symmetric binary adjacency; repeated edges collapse to one entry
+    adjacency = sparse.coo_matrix(
+        (np.ones(2 * len(sources), dtype=np.int8),
+         (np.concatenate([sources, targets]), np.concatenate([targets, sources]))),
+        shape=(n_nodes, n_nodes)
+    ).tocsr()
+    adjacency.data[:] = 1
+
+    membership, module_labels = build_modules(adjacency, module_type, node_keys)
+    module_sizes = np.asarray(membership.sum(axis=0)).ravel()
+    keep_modules = module_sizes >= min_module_size
+    membership, module_labels, module_sizes = (
+        membership[:, keep_modules], module_labels[keep_modules], module_sizes[keep_modules]
+    )
+
+    # Disease x gene incidence, restricted to genes in the network
+    diseases = diseases[diseases['gene_key'].isin(node_keys)]
+    disease_ids, disease_index = np.unique(diseases['DOID'].to_numpy(), return_inverse=True)
+    gene_index = np.searchsorted(node_keys, diseases['gene_key'].to_numpy())
+    incidence = sparse.csr_matrix(
+        (np.ones(len(diseases), dtype=bool), (disease_index, gene_index)),
+        shape=(len(disease_ids), n_nodes)
+    )
+    disease_sizes = np.asarray(incidence.sum(axis=1)).ravel()
+    keep_diseases = disease_sizes >= min_disease_genes
+    incidence, disease_ids, disease_sizes = (
+        incidence[keep_diseases], disease_ids[keep_diseases], disease_sizes[keep_diseases]
+    )
+
+    if incidence.shape[0] == 0 or membership.shape[1] == 0:
+        return pd.DataFrame(columns=RESULT_COLS)
+
+    overlap = (incidence.astype(np.int32) @ membership.astype(np.int32)).tocoo()
+    rows, cols, overlaps = overlap.row, overlap.col, overlap.data
+
+    p_values = hypergeom.sf(overlaps - 1, n_nodes, disease_sizes[rows], module_sizes[cols])
+    q_values = benjamini_hochberg(p_values, incidence.shape[0] * membership.shape[1])
+    significant = q_values <= max_q_value
+
+    rows, cols, overlaps = rows[significant], cols[significant], overlaps[significant]
+    expected = disease_sizes[rows] * module_sizes[cols] / n_nodes
+    disease_names = diseases.drop_duplicates('DOID').set_index('DOID')['DOtermName']
+
+    results = pd.DataFrame({
+        'taxon_id': taxon_id,
+        'species_name': species_name,
+        'DOID': disease_ids[rows],
+        'DOtermName': disease_names.reindex(disease_ids[rows]).to_numpy(),
+        'module': module_labels[cols],
+        'module_size': module_sizes[cols],
+        'disease_genes': disease_sizes[rows],
+        'overlap': overlaps,
+        'expected': expected,
+        'fold_enrichment': overlaps / expected,
+        'p_value': p_values[significant],
+        'q_value': q_values[significant],
+    }, columns=RESULT_COLS)
+    return results.sort_values(['q_value', 'p_value', 'DOID', 'module'], ignore_index=True)
+
+
+def _enrich_species_task(task):
+    return enrich_species(*task)
+
+
+def run_enrichment(module_type: str = 'neighborhood',
+                   min_module_size: int = MIN_MODULE_SIZE,
+                   min_disease_genes: int = MIN_DISEASE_GENES,
+                   max_q_value: float = MAX_Q_VALUE,
+                   workers: int = None,
+                   taxa=None,
+                   databases=None) -> pd.DataFrame:
+    """
+    Run disease x module enrichment for every species, one worker process per species.
+
+    Returns:
+        pd.DataFrame: Significant disease-module pairs of all species
+    """
+    edges_file = subset_input_path(VALID_INTERACTIONS_FILE, taxa, databases)
+    species_map = load_species_map()
+    taxa = get_subset_taxa(species_map, taxa, databases)
+
+    edges = load_network_edges(taxa, edges_file)
+    diseases = load_disease_genes(species_map, taxa)
+    edges_by_taxon = dict(tuple(edges.groupby('taxonId')))
+    diseases_by_taxon = dict(tuple(diseases.groupby('taxonId')))
+
+    tasks = [
+        (taxon_id, species_map.get(taxon_id, {}).get('name', 'Unknown species'),
+         edges_by_taxon[taxon_id], diseases_by_taxon[taxon_id],
+         module_type, min_module_size, min_disease_genes, max_q_value)
+        for taxon_id in sorted(set(edges_by_taxon) & set(diseases_by_taxon))
+    ]
+    print(f"Testing {len(tasks)} species with {module_type} modules")
+
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        species_results = list(pool.map(_enrich_species_task, tasks))
+
+    results = [r for r in species_results if not r.empty]
+    if not results:
+        return pd.DataFrame(columns=RESULT_COLS)
+    return pd.concat(results, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Disease enrichment in interaction network modules")
+    parser.add_argument('--modules', choices=MODULE_TYPES, default='neighborhood',
+                        help="Gene neighborhoods or connected components as modules")
+    parser.add_argument('--min-module-size', type=int, default=MIN_MODULE_SIZE)
+    parser.add_argument('--min-disease-genes', type=int, default=MIN_DISEASE_GENES)
+    parser.add_argument('--max-q', type=float, default=MAX_Q_VALUE,
+                        help="Report pairs with Benjamini-Hochberg q-value at or below this")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes, one species each (default: all CPUs)")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+
+    results = run_enrichment(module_type=args.modules,
+                             min_module_size=args.min_module_size,
+                             min_disease_genes=args.min_disease_genes,
+                             max_q_value=args.max_q,
+                             workers=args.workers,
+                             taxa=args.taxa,
+                             databases=args.databases)
+
+    # Subset runs write under data/processed/subsets/ instead of over the full results
+    output_file = subset_output_path(OUTPUT_FILE, args.taxa, args.databases)
+    results.to_csv(output_file, index=False)
+    print(f"\nSignificant disease-module pairs: {len(results)}")
+    print(f"Results saved to: {output_file}")
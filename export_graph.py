@@ -0,0 +1,197 @@
+import argparse
+import csv
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from utils.species_utils import (
+    load_species_map,
+    add_subset_arguments,
+    normalize_taxa,
+    normalize_databases,
+    subset_input_path,
+    subset_output_path
+)
+from validate_gene_interactions import build_gene_keys, filter_gene_nodes, filter_interactions
+
+# Define constants
+GENE_NODES_FILE = Path('data/processed/GeneDescriptions/gene_nodes.csv')
+VALID_INTERACTIONS_FILE = Path('data/processed/GeneticInteractions/valid_interactions.csv')
+EXPORT_DIR = Path('data/processed/Graph')
+
+NODE_LABEL = 'Gene'
+EDGE_TYPE = 'GENETIC_INTERACTION'
+CHUNK_SIZE = 100000
+
+# Neo4j bulk-import headers (neo4j-admin database import full)
+NODE_HEADER = [
+    'id:ID(Gene)', 'geneKey', 'geneId', 'symbol', 'description',
+    'species', 'database', 'taxonId:int', ':LABEL'
+]
+EDGE_HEADER = [
+    ':START_ID(Gene)', ':END_ID(Gene)', 'database', 'taxonId:int', 'evidenceCount:int', ':TYPE'
+]
+
+# Binary edge list: one little-endian (source, target) pair of uint32 node IDs per edge
+EDGE_DTYPE = np.dtype([('source', '<u4'), ('target', '<u4')])
+
+
+def export_nodes(species_map, nodes_file, chunk_size=CHUNK_SIZE,
+                 gene_nodes_file=GENE_NODES_FILE, taxa=None, databases=None):
+    """
+    Stream gene_nodes.csv into a Neo4j node CSV, assigning integer IDs.
+
+    IDs are ordinals in gene_nodes.csv order, so the same input always yields
+    the same IDs. Repeated gene keys keep the ID of their first occurrence.
+
+    Args:
+        species_map: The loaded species map dictionary
+        nodes_file: Output path of the node CSV
+        chunk_size: Rows read per chunk
+        gene_nodes_file: Input gene_nodes.csv
+        taxa: Normalized taxon IDs filter
+        databases: Normalized database names filter
+
+    Returns:
+        dict: Mapping from gene key ('database:geneId:taxonId') to node ID
+    """
+    node_ids = {}
+    write_header = True
+
+    reader = pd.read_csv(gene_nodes_file, quoting=csv.QUOTE_ALL, dtype=str, chunksize=chunk_size)
+    for chunk in reader:
+        chunk['gene_key'] = build_gene_keys(chunk, species_map)
+        chunk = filter_gene_nodes(chunk, taxa, databases)
+        chunk = chunk[~chunk['gene_key'].isin(node_ids)]
+        chunk = chunk.drop_duplicates('gene_key')
+
+        ids = np.arange(len(node_ids), len(node_ids) + len(chunk), dtype=np.int64)
+        node_ids.update(zip(chunk['gene_key'], ids.tolist()))
+
+        pd.DataFrame({
+            'id:ID(Gene)': ids,
+            'geneKey': chunk['gene_key'].to_numpy(),
+            'geneId': chunk['geneId'].to_numpy(),
+            'symbol': chunk['Symbol'].to_numpy(),
+            'description': chunk['Description'].to_numpy(),
+            'species': chunk['Species'].to_numpy(),
+            'database': chunk['database'].to_numpy(),
+            'taxonId:int': chunk['taxonId'].to_numpy(),
+            ':LABEL': NODE_LABEL,
+        }, columns=NODE_HEADER).to_csv(nodes_file, mode='w' if write_header else 'a',
+                                       header=write_header, index=False)
+        write_header = False
+
+    return node_ids
+
+
+def export_edges(node_ids, edges_file, binary_file, chunk_size=CHUNK_SIZE,
+                 interactions_file=VALID_INTERACTIONS_FILE, taxa=None, databases=None):
+    """
+    Stream valid_interactions.csv into a Neo4j relationship CSV and a binary edge list.
+
+    Args:
+        node_ids: Mapping from gene key to node ID from export_nodes()
+        edges_file: Output path of the relationship CSV
+        binary_file: Output path of the binary edge list
+        chunk_size: Rows read per chunk
+        interactions_file: Input valid_interactions.csv
+        taxa: Normalized taxon IDs filter
+        databases: Normalized database names filter
+
+    Returns:
+        tuple: (edges written, edges skipped because an endpoint has no node)
+    """
+    written = 0
+    skipped = 0
+    write_header = True
+
+    reader = pd.read_csv(interactions_file, dtype={'taxonId': str}, chunksize=chunk_size)
+    with open(binary_file, 'wb') as binary_out:
+        for chunk in reader:
+            chunk = filter_interactions(chunk, taxa, databases)
+            source = chunk['from_key'].map(node_ids)
+            target = chunk['to_key'].map(node_ids)
+            resolved = (source.notna() & target.notna()).to_numpy()
+            skipped += int((~resolved).sum())
+
+            chunk = chunk[resolved]
+            source = source[resolved].astype(np.int64).to_numpy()
+            target = target[resolved].astype(np.int64).to_numpy()
+            if 'evidenceCount' in chunk.columns:
+                evidence = chunk['evidenceCount'].to_numpy()
+            else:
+                evidence = 1
+
+            pd.DataFrame({
+                ':START_ID(Gene)': source,
+                ':END_ID(Gene)': target,
+                'database': chunk['database'].to_numpy(),
+                'taxonId:int': chunk['taxonId'].to_numpy(),
+                'evidenceCount:int': evidence,
+                ':TYPE': EDGE_TYPE,
+            }, columns=EDGE_HEADER).to_csv(edges_file, mode='w' if write_header else 'a',
+                                           header=write_header, index=False)
+            write_header = False
+
+            pairs = np.empty(len(source), dtype=EDGE_DTYPE)
+            pairs['source'] = source
+            pairs['target'] = target
+            pairs.tofile(binary_out)
+            written += len(pairs)
+
+    return written, skipped
+
+
+def load_binary_edges(binary_file=EXPORT_DIR / 'edges.bin'):
+    """Memory-map a binary edge list written by export_edges()."""
+    return np.memmap(binary_file, dtype=EDGE_DTYPE, mode='r')
+
+
+def export_graph(output_dir=None, chunk_size=CHUNK_SIZE, taxa=None, databases=None):
+    """
+    Export gene nodes and valid interactions in bulk-import formats.
+
+    taxa and databases restrict the export to those taxon IDs and databases.
+    Subset runs read the files of an earlier run of the same subset and, unless
+    output_dir is given, write to the subset copy of EXPORT_DIR.
+    """
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+    if output_dir is None:
+        output_dir = subset_output_path(EXPORT_DIR, taxa, databases)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    species_map = load_species_map()
+    gene_nodes_file = subset_input_path(GENE_NODES_FILE, taxa, databases)
+    interactions_file = subset_input_path(VALID_INTERACTIONS_FILE, taxa, databases)
+
+    nodes_file = output_dir / 'nodes.csv'
+    edges_file = output_dir / 'edges.csv'
+    binary_file = output_dir / 'edges.bin'
+
+    node_ids = export_nodes(species_map, nodes_file, chunk_size, gene_nodes_file, taxa, databases)
+    if len(node_ids) > np.iinfo(np.uint32).max:
+        raise ValueError(f"Too many nodes for a uint32 edge list: {len(node_ids)}")
+    written, skipped = export_edges(node_ids, edges_file, binary_file, chunk_size,
+                                    interactions_file, taxa, databases)
+
+    print(f"\nNodes exported: {len(node_ids)} -> {nodes_file}")
+    print(f"Edges exported: {written} -> {edges_file}, {binary_file}")
+    if skipped:
+        print(f"Warning: {skipped} edges skipped because an endpoint is not in {gene_nodes_file}")
+    print("\nLoad into Neo4j with:")
+    print(f"  neo4j-admin database import full --nodes={nodes_file} "
+          f"--relationships={edges_file} <database>")
+
+    return nodes_file, edges_file, binary_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the gene interaction graph for bulk import")
+    parser.add_argument('--output-dir', type=Path, default=None,
+                        help=f"Directory for nodes.csv, edges.csv and edges.bin (default: {EXPORT_DIR})")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Rows read and written per chunk")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+    export_graph(args.output_dir, args.chunk_size, taxa=args.taxa, databases=args.databases)
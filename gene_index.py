@@ -0,0 +1,261 @@
+import argparse
+import csv
+import json
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional, Union
+from utils.species_utils import (
+    load_species_map,
+    add_subset_arguments,
+    normalize_taxa,
+    normalize_databases,
+    subset_input_path,
+    subset_output_path
+)
+from validate_gene_interactions import build_gene_keys, filter_gene_nodes
+
+# Define constants
+GENE_NODES_FILE = Path('data/processed/GeneDescriptions/gene_nodes.csv')
+INDEX_DIR = Path('data/processed/GeneIndex')
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'that', 'the', 'to', 'with'
+}
+
+# BM25 ranking parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Arrays making up an index; each is saved as <name>.npy and loaded memory-mapped
+INDEX_ARRAYS = [
+    'doc_gene_ids', 'doc_symbols', 'doc_species', 'doc_lengths',
+    'terms', 'term_offsets', 'postings_docs', 'postings_tf',
+    'symbol_keys', 'symbol_docs'
+]
+
+
+def tokenize(text) -> List[str]:
+    """Lowercase text and split it into alphanumeric tokens, dropping stopwords."""
+    if not isinstance(text, str):
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def build_index(gene_nodes: pd.DataFrame, index_dir: Union[str, Path] = INDEX_DIR) -> Path:
+    """
+    Build an on-disk inverted index over gene symbols and descriptions.
+
+    Every gene_nodes row is one document. Postings are stored in CSR form:
+    the postings of terms[i] are postings_docs[term_offsets[i]:term_offsets[i + 1]].
+    Symbols are also kept lowercased and sorted in symbol_keys, so exact and
+    prefix lookups are binary searches.
+
+    Args:
+        gene_nodes: Output of CombineAllGeneDescription (database, geneId, Symbol, Description, Species)
+        index_dir: Directory the index arrays are written to
+
+    Returns:
+        Path: The index directory
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    gene_nodes = gene_nodes.reset_index(drop=True)
+
+    symbols = gene_nodes['Symbol'].fillna('').astype(str)
+    species_codes, species_names = pd.factorize(gene_nodes['Species'].fillna('').str.upper(), sort=True)
+
+    # Tokenize symbol and description together so a symbol is also a searchable term
+    tokens = pd.Series(
+        [tokenize(f"{symbol} {description}" if isinstance(description, str) else symbol)
+         for symbol, description in zip(symbols, gene_nodes['Description'])],
+        index=gene_nodes.index
+    )
+    doc_lengths = tokens.str.len().to_numpy(dtype=np.uint32)
+
+    term_doc = tokens.explode().dropna()
+    term_doc = pd.DataFrame({'term': term_doc.to_numpy(), 'doc': term_doc.index.to_numpy()})
+    postings = term_doc.groupby(['term', 'doc'], sort=True).size()
+
+    terms = postings.index.get_level_values('term').unique().to_numpy(dtype=str)
+    term_positions = np.searchsorted(terms, postings.index.get_level_values('term').to_numpy(dtype=str))
+    term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_positions, minlength=len(terms)), out=term_offsets[1:])
+
+    # Sorted case-insensitive symbol table
+    symbol_keys = symbols.str.lower().to_numpy(dtype=str)
+    symbol_order = np.argsort(symbol_keys, kind='stable')
+
+    arrays = {
+        'doc_gene_ids': (gene_nodes['database'].astype(str) + ':' + gene_nodes['geneId'].astype(str)).to_numpy(dtype=str),
+        'doc_symbols': symbols.to_numpy(dtype=str),
+        'doc_species': species_codes.astype(np.uint8),
+        'doc_lengths': doc_lengths,
+        'terms': terms,
+        'term_offsets': term_offsets,
+        'postings_docs': postings.index.get_level_values('doc').to_numpy(dtype=np.int32),
+        'postings_tf': np.minimum(postings.to_numpy(), np.iinfo(np.uint16).max).astype(np.uint16),
+        'symbol_keys': symbol_keys[symbol_order],
+        'symbol_docs': symbol_order.astype(np.int32),
+    }
+    for name, array in arrays.items():
+        np.save(index_dir / f'{name}.npy', array)
+
+    with open(index_dir / 'index_metadata.json', 'w') as f:
+        json.dump({
+            'species': list(species_names),
+            'documents': len(gene_nodes),
+            'terms': len(terms),
+            'postings': len(postings),
+            'average_doc_length': float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        }, f, indent=2)
+
+    print(f"\nIndexed {len(gene_nodes)} genes, {len(terms)} terms, {len(postings)} postings into {index_dir}")
+    return index_dir
+
+
+class GeneIndex:
+    """Read-only, memory-mapped view of an index written by build_index()."""
+
+    def __init__(self, index_dir: Union[str, Path] = INDEX_DIR):
+        index_dir = Path(index_dir)
+        for name in INDEX_ARRAYS:
+            setattr(self, name, np.load(index_dir / f'{name}.npy', mmap_mode='r'))
+        with open(index_dir / 'index_metadata.json') as f:
+            metadata = json.load(f)
+        self.species = metadata['species']
+        self.average_doc_length = metadata['average_doc_length'] or 1.0
+
+    def _species_codes(self, species) -> Optional[np.ndarray]:
+        if species is None:
+            return None
+        if isinstance(species, str):
+            species = [species]
+        return np.array([self.species.index(s.upper()) for s in species if s.upper() in self.species],
+                        dtype=np.uint8)
+
+    def _results(self, docs: np.ndarray, scores: Optional[np.ndarray] = None) -> List[dict]:
+        results = []
+        for position, doc in enumerate(docs):
+            result = {
+                'geneId': str(self.doc_gene_ids[doc]),
+                'symbol': str(self.doc_symbols[doc]),
+                'species': self.species[self.doc_species[doc]],
+            }
+            if scores is not None:
+                result['score'] = float(scores[position])
+            results.append(result)
+        return results
+
+    def _restrict(self, docs: np.ndarray, species) -> np.ndarray:
+        codes = self._species_codes(species)
+        if codes is None:
+            return docs
+        return docs[np.isin(self.doc_species[docs], codes)]
+
+    def lookup_symbol(self, symbol: str, species=None) -> List[dict]:
+        """Find genes whose symbol matches exactly, ignoring case."""
+        key = symbol.lower()
+        start = np.searchsorted(self.symbol_keys, key, side='left')
+        end = np.searchsorted(self.symbol_keys, key, side='right')
+        docs = self._restrict(np.asarray(self.symbol_docs[start:end]), species)
+        return self._results(docs)
+
+    def prefix_symbol(self, prefix: str, species=None, limit: int = 20) -> List[dict]:
+        """Find genes whose symbol starts with prefix, ignoring case, in symbol order."""
+        key = prefix.lower()
+        start = np.searchsorted(self.symbol_keys, key, side='left')
+        end = np.searchsorted(self.symbol_keys, key + '\U0010ffff', side='left')
+        docs = self._restrict(np.asarray(self.symbol_docs[start:end]), species)
+        return self._results(docs[:limit])
+
+    def search(self, query: str, species=None, limit: int = 10) -> List[dict]:
+        """
+        Rank genes against a free-text query with BM25.
+
+        Args:
+            query: Free text; tokenized like the indexed documents
+            species: Species code or list of codes (e.g. 'ZFIN') to restrict results to
+            limit: Maximum number of results
+
+        Returns:
+            List[dict]: geneId, symbol, species and score, best match first
+        """
+        doc_parts = []
+        weight_parts = []
+        n_docs = len(self.doc_lengths)
+
+        for term in set(tokenize(query)):
+            position = np.searchsorted(self.terms, term)
+            if position >= len(self.terms) or self.terms[position] != term:
+                continue
+            start, end = self.term_offsets[position], self.term_offsets[position + 1]
+            docs = np.asarray(self.postings_docs[start:end])
+            tf = np.asarray(self.postings_tf[start:end], dtype=np.float64)
+
+            df = end - start
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            length_norm = 1.0 - BM25_B + BM25_B * self.doc_lengths[docs] / self.average_doc_length
+            doc_parts.append(docs)
+            weight_parts.append(idf * tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * length_norm))
+
+        if not doc_parts:
+            return []
+
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weight_parts))
+
+        codes = self._species_codes(species)
+        if codes is not None:
+            keep = np.isin(self.doc_species[docs], codes)
+            docs, scores = docs[keep], scores[keep]
+
+        if len(docs) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            docs, scores = docs[top], scores[top]
+        order = np.lexsort((docs, -scores))
+        return self._results(docs[order], scores[order])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the gene symbol/description index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build the index from gene_nodes.csv")
+    build_parser.add_argument('--index-dir', type=Path, default=None,
+                              help=f"Index directory (default: {INDEX_DIR}, or its subset copy)")
+    add_subset_arguments(build_parser)
+
+    for command in ('search', 'symbol', 'prefix'):
+        query_parser = subparsers.add_parser(command, help=f"Run a {command} query against the index")
+        query_parser.add_argument('query')
+        query_parser.add_argument('--species', action='append',
+                                  help="Restrict to a species code (repeatable), e.g. ZFIN")
+        query_parser.add_argument('--limit', type=int, default=10)
+        query_parser.add_argument('--index-dir', type=Path, default=None,
+                                  help=f"Index directory (default: {INDEX_DIR}, or its subset copy)")
+        add_subset_arguments(query_parser)
+
+    args = parser.parse_args()
+    taxa = normalize_taxa(args.taxa)
+    databases = normalize_databases(args.databases)
+    if args.command == 'build':
+        gene_nodes = pd.read_csv(subset_input_path(GENE_NODES_FILE, taxa, databases),
+                                 quoting=csv.QUOTE_ALL, dtype=str)
+        if taxa is not None or databases is not None:
+            gene_nodes['gene_key'] = build_gene_keys(gene_nodes, load_species_map())
+            gene_nodes = filter_gene_nodes(gene_nodes, taxa, databases)
+        build_index(gene_nodes, args.index_dir or subset_output_path(INDEX_DIR, taxa, databases))
+    else:
+        index = GeneIndex(args.index_dir or subset_input_path(INDEX_DIR, taxa, databases))
+        if args.command == 'search':
+            results = index.search(args.query, species=args.species, limit=args.limit)
+        elif args.command == 'symbol':
+            results = index.lookup_symbol(args.query, species=args.species)
+        else:
+            results = index.prefix_symbol(args.query, species=args.species, limit=args.limit)
+        for result in results:
+            print(result)
@@ -1,4 +1,19 @@
-from utils.species_utils import is_valid_species_code, load_species_map
+import argparse
+import json
+from mitab_index import MitabIndexBuilder, default_index_dir
+from utils.species_utils import (
+    is_valid_species_code,
+    load_species_map,
+    add_subset_arguments,
+    get_subset_taxa,
+    normalize_taxa,
+    taxid_markers,
+    subset_output_path
+)
+
+MOL_INTERACTIONS_FILE = "data/raw/MolecularInteractions/INTERACTION-MOL_COMBINED.tsv"
+SYNONYMS_OUTPUT_FILE = "data/processed/gene_synonyms.json"
+
 def parse_synonyms(line, field_index):
     # Split the line by tabs
     fields = line.strip().split('\t')
@@ -69,7 +84,7 @@ def find_gene_in_descriptions(gene_id, synonyms, gene_descriptions, taxon):
     
     return None, None
 
-def load_gene_descriptions():
+def load_gene_descriptions(taxa=None):
     gene_desc_files = [
         "data/raw/GeneDescriptions/GENE-DESCRIPTION-TSV_FB.tsv",
         "data/raw/GeneDescriptions/GENE-DESCRIPTION-TSV_HUMAN.tsv",
@@ -83,6 +98,7 @@ def load_gene_descriptions():
     
     # Load species map
     species_map = load_species_map()
+    taxa = normalize_taxa(taxa)
     # Create reverse lookup from short_name to taxon_id
     short_name_to_taxon = {info['short_name']: taxon_id 
                           for taxon_id, info in species_map.items()}
@@ -98,6 +114,8 @@ def load_gene_descriptions():
             if not taxon_id:
                 print(f"Warning: Could not find taxon ID for {short_name} from {file_path}")
                 continue
+            if taxa is not None and taxon_id not in taxa:
+                continue
 
             print(taxon_id)    
             with open(file_path, 'r') as f:
@@ -113,23 +131,64 @@ def load_gene_descriptions():
         except FileNotFoundError:
             print(f"Warning: Could not find file {file_path}")
     return gene_descriptions
+
+def gene_descriptions_from_nodes(gene_nodes, species_map, taxa=None):
+    """
+    Build the taxon_id -> set of gene IDs lookup from an in-memory gene_nodes frame.
+
+    Equivalent to load_gene_descriptions() without re-reading the raw description files.
+    """
+    short_name_to_taxon = {info['short_name']: taxon_id
+                          for taxon_id, info in species_map.items()}
+    taxa = normalize_taxa(taxa)
+    gene_descriptions = {}
+    taxon_ids = gene_nodes['Species'].str.lower().map(short_name_to_taxon)
+    for taxon_id, gene_ids in gene_nodes['geneId'].groupby(taxon_ids):
+        if taxa is not None and taxon_id not in taxa:
+            continue
+        gene_descriptions[taxon_id] = set(gene_ids.dropna())
+    return gene_descriptions
+
+def save_gene_synonyms(synonyms_dict, output_file=SYNONYMS_OUTPUT_FILE):
+    """Save the synonyms dictionary to a JSON file."""
+    with open(output_file, 'w') as f:
+        json.dump(synonyms_dict, f, indent=2)
+    print(f"\nSaved synonyms dictionary to {output_file}")
     
-def process_interaction_file(filename, gene_descriptions):
+def process_interaction_file(filename, gene_descriptions, taxa=None, indexer=None):
     # Modified to organize by taxon ID
     gene_synonyms = {}
     formatted_synonyms_dict = {}
     taxon_db_pairs = set()
+    taxa = normalize_taxa(taxa)
+    markers = taxid_markers(taxa)
+    byte_markers = tuple(marker.encode() for marker in markers) if markers is not None else None
     
-    with open(filename, 'r') as f:
-        for line in f:
-            if line.startswith('#') or not line.strip():
+    # Read bytes so the row start offsets for the optional MitabIndexBuilder come for free
+    with open(filename, 'rb') as f:
+        offset = 0
+        for raw_line in f:
+            line_offset = offset
+            offset += len(raw_line)
+            if raw_line.startswith(b'#') or not raw_line.strip():
+                continue
+            # Subset runs: reject lines without a wanted taxid before decoding, splitting or parsing aliases
+            if byte_markers is not None and not any(marker in raw_line for marker in byte_markers):
                 continue
+            line = raw_line.decode('utf-8')
             
             fields = line.strip().split('\t')
             gene_a = fields[0].split(':')[1] if ':' in fields[0] else fields[0]
             gene_b = fields[1].split(':')[1] if ':' in fields[1] else fields[1]
             taxon_a = get_taxon_id(fields[9])
             taxon_b = get_taxon_id(fields[10])
+            if indexer is not None:
+                indexer.add(line_offset, fields[0], taxon_a)
+                indexer.add(line_offset, fields[1], taxon_b)
+            if taxa is not None:
+                # The marker check only finds candidates; keep the interactors that really match
+                taxon_a = taxon_a if taxon_a in taxa else None
+                taxon_b = taxon_b if taxon_b in taxa else None
             
             # Get database names
             db_a = get_database_name(fields[0])
@@ -183,23 +242,30 @@ def process_interaction_file(filename, gene_descriptions):
 
 # Example usage
 if __name__ == "__main__":
-    filename = "data/raw/MolecularInteractions/INTERACTION-MOL_COMBINED.tsv"
+    parser = argparse.ArgumentParser(description="Build the gene synonyms dictionary from molecular interactions")
+    add_subset_arguments(parser)
+    parser.add_argument('--index', action='store_true',
+                        help="Also record byte offsets of every row for mitab_index.py lookups")
+    args = parser.parse_args()
+
+    filename = MOL_INTERACTIONS_FILE
     try:
-        # First load all gene descriptions
-        gene_descriptions = load_gene_descriptions()
         # Load species map for db_name lookup
         species_map = load_species_map()
+        # Databases map to the taxa that use them, since synonyms are organized per taxon
+        taxa = get_subset_taxa(species_map, args.taxa, args.databases)
+        # First load all gene descriptions
+        gene_descriptions = load_gene_descriptions(taxa)
         print(f"Loaded {len(gene_descriptions)} gene descriptions")
         
         # Then process interaction file
-        taxon_db_pairs, synonyms_dict = process_interaction_file(filename, gene_descriptions)
+        indexer = MitabIndexBuilder(filename) if args.index else None
+        taxon_db_pairs, synonyms_dict = process_interaction_file(filename, gene_descriptions, taxa, indexer)
+        if indexer is not None:
+            indexer.save(subset_output_path(default_index_dir(filename), args.taxa, args.databases))
         
-        # Save synonyms dictionary to file
-        import json
-        output_file = "data/processed/gene_synonyms.json"
-        with open(output_file, 'w') as f:
-            json.dump(synonyms_dict, f, indent=2)
-        print(f"\nSaved synonyms dictionary to {output_file}")
+        # Save synonyms dictionary to file; subset runs keep the full-release file intact
+        save_gene_synonyms(synonyms_dict, subset_output_path(SYNONYMS_OUTPUT_FILE, args.taxa, args.databases))
         
         # Print sample of the saved format
         print("\nSample of saved synonym format:")
@@ -0,0 +1,338 @@
+import argparse
+import json
+import mmap
+import os
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+from utils.species_utils import load_species_map, add_subset_arguments, get_subset_taxa, subset_input_path
+
+# Define constants
+INDEX_ROOT = Path('data/processed/MitabIndex')
+MITAB_FILES = {
+    'mol': Path('data/raw/MolecularInteractions/INTERACTION-MOL_COMBINED.tsv'),
+    'gen': Path('data/raw/GeneticInteractions/INTERACTION-GEN_COMBINED.tsv'),
+}
+
+# Arrays making up an index; each is saved as <name>.npy and loaded memory-mapped
+INDEX_ARRAYS = ['keys', 'taxa', 'offsets']
+
+# Bytes scanned per numpy pass when locating row starts, and add() entries buffered per array chunk
+SCAN_BLOCK_SIZE = 64 * 1024 * 1024
+ADD_BUFFER_SIZE = 100000
+
+# Bare taxon IDs ('7955') and MITAB taxid fields ('taxid:7955(Danio rerio)')
+TAXON_ID_PATTERN = re.compile(r'(?:^|taxid:)(\d+)')
+
+
+def default_index_dir(source_file: Union[str, Path]) -> Path:
+    """Index directory for a MITAB file, e.g. data/processed/MitabIndex/INTERACTION-GEN_COMBINED."""
+    return INDEX_ROOT / Path(source_file).stem
+
+
+def normalize_interactor_id(interactor_id: str) -> str:
+    """Lowercase an interactor ID and drop its 'database:' prefix."""
+    return interactor_id.split(':', 1)[-1].strip().lower()
+
+
+def parse_taxon_id(taxon) -> int:
+    """Taxon ID of a bare ID or a MITAB 'taxid:7955(...)' field, or -1 when there is none."""
+    if taxon is None or pd.isna(taxon):
+        return -1
+    match = TAXON_ID_PATTERN.search(str(taxon))
+    return int(match.group(1)) if match else -1
+
+
+def scan_row_offsets(data: np.ndarray) -> np.ndarray:
+    """
+    Byte offsets of the data rows of a MITAB file, in file order.
+
+    Lines are located with a vectorized newline search, one SCAN_BLOCK_SIZE
+    block at a time. Comment lines, blank lines and the header (the first
+    remaining line) are skipped, as read_csv(comment='#') skips them, so the
+    offsets line up with the rows read_csv returns.
+
+    Args:
+        data: The file contents as a uint8 array, e.g. over an mmap
+
+    Returns:
+        np.ndarray: uint64 start offsets of the data rows
+    """
+    size = len(data)
+    line_starts = [np.zeros(1, dtype=np.uint64)]
+    for block_start in range(0, size, SCAN_BLOCK_SIZE):
+        block = data[block_start:block_start + SCAN_BLOCK_SIZE]
+        line_starts.append((np.flatnonzero(block == ord('\n')) + block_start + 1).astype(np.uint64))
+    line_starts = np.concatenate(line_starts)
+    line_starts = line_starts[line_starts < size]
+
+    first_bytes = data[line_starts]
+    second_bytes = data[np.minimum(line_starts + 1, size - 1)]
+    blank = (first_bytes == ord('\n')) | ((first_bytes == ord('\r')) & (second_bytes == ord('\n')))
+    rows = line_starts[(first_bytes != ord('#')) & ~blank]
+    return rows[1:]
+
+
+class MitabRowOffsets:
+    """
+    Hand out the byte offsets of the rows a chunked read_csv returns, chunk by chunk.
+
+    read_csv can return fewer rows than there are lines, e.g. for a quoted
+    field spanning lines. take() therefore checks every chunk against the
+    raw bytes and raises ValueError as soon as rows and lines stop lining up.
+    """
+
+    def __init__(self, source_file: Union[str, Path]):
+        self.source_file = Path(source_file)
+        self._file = open(self.source_file, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = np.frombuffer(self._mmap, dtype=np.uint8)
+        self.offsets = scan_row_offsets(data)
+        del data  # Release the buffer export so the mmap can be closed
+        self.position = 0
+
+    def _row_starts_with(self, offset: int, value) -> bool:
+        if pd.isna(value):
+            return True
+        value = str(value).encode('utf-8')
+        offset = int(offset)
+        head = self._mmap[offset:offset + len(value) + 1]
+        return head.startswith(value) or head.startswith(b'"' + value)
+
+    def take(self, first_fields: pd.Series) -> np.ndarray:
+        """
+        Offsets of the next len(first_fields) rows.
+
+        Args:
+            first_fields: First column of the chunk, as parsed by read_csv
+
+        Returns:
+            np.ndarray: One uint64 offset per row of the chunk
+        """
+        n_rows = len(first_fields)
+        offsets = self.offsets[self.position:self.position + n_rows]
+        self.position += n_rows
+        if len(offsets) != n_rows or (n_rows and not (
+                self._row_starts_with(offsets[0], first_fields.iloc[0])
+                and self._row_starts_with(offsets[-1], first_fields.iloc[-1]))):
+            raise ValueError(
+                f"Rows parsed from {self.source_file} no longer line up with its lines near row "
+                f"{self.position - n_rows}; the file has rows spanning several lines (quoted fields?)"
+            )
+        return offsets
+
+    def close(self, check: bool = True) -> None:
+        """Release the file; with check, first make sure every data line was matched by a row."""
+        unmatched = len(self.offsets) - self.position
+        self._mmap.close()
+        self._file.close()
+        if check and unmatched:
+            raise ValueError(f"{unmatched} lines of {self.source_file} were not parsed as rows")
+
+
+class MitabIndexBuilder:
+    """
+    Collect (interactor ID, taxon, byte offset) entries during an existing scan.
+
+    Scans call add() per interactor or add_many() per chunk with the byte
+    offset of the row start, then save() once at the end. Interactor IDs are
+    normalized once per distinct ID and kept as integer codes into a shared
+    vocabulary, so each entry costs 20 bytes of numpy arrays (int32 key
+    code, int64 taxon, uint64 offset); the per-chunk arrays are concatenated
+    in save().
+    """
+
+    def __init__(self, source_file: Union[str, Path]):
+        self.source_file = Path(source_file)
+        self.vocabulary = {}
+        self.keys = []
+        self.key_chunks = []
+        self.taxon_chunks = []
+        self.offset_chunks = []
+        self._buffer = ([], [], [])
+
+    def _key_code(self, interactor_id: str) -> int:
+        code = self.vocabulary.get(interactor_id)
+        if code is None:
+            code = self.vocabulary[interactor_id] = len(self.keys)
+            self.keys.append(normalize_interactor_id(interactor_id))
+        return code
+
+    def add(self, offset: int, interactor_id: str, taxon_id: Optional[str]) -> None:
+        """Record one interactor of the row starting at byte offset."""
+        if not interactor_id or interactor_id == '-':
+            return
+        key_codes, taxa, offsets = self._buffer
+        key_codes.append(self._key_code(interactor_id))
+        taxa.append(parse_taxon_id(taxon_id))
+        offsets.append(offset)
+        if len(key_codes) >= ADD_BUFFER_SIZE:
+            self._flush()
+
+    def add_many(self, offsets: Iterable[int], interactor_ids: pd.Series, taxon_ids: pd.Series) -> None:
+        """
+        Record one interactor column of a chunk; offsets align with the chunk rows.
+
+        taxon_ids may be bare IDs or raw MITAB 'taxid:7955(...)' fields. Both
+        columns are factorized, so only their distinct values are parsed.
+        """
+        keep = (interactor_ids.notna() & (interactor_ids != '-')).to_numpy()
+        if not keep.any():
+            return
+        id_codes, distinct_ids = pd.factorize(interactor_ids[keep])
+        distinct_ids = distinct_ids.tolist()
+        key_codes = list(map(self.vocabulary.get, distinct_ids))
+        if None in key_codes:
+            key_codes = [code if code is not None else self._key_code(interactor_id)
+                         for code, interactor_id in zip(key_codes, distinct_ids)]
+        key_codes = np.array(key_codes, dtype=np.int32)
+        taxon_codes, distinct_taxa = pd.factorize(taxon_ids[keep], use_na_sentinel=False)
+        taxa = np.array([parse_taxon_id(taxon) for taxon in distinct_taxa.tolist()], dtype=np.int64)
+
+        self.key_chunks.append(key_codes[id_codes])
+        self.taxon_chunks.append(taxa[taxon_codes])
+        self.offset_chunks.append(np.asarray(offsets, dtype=np.uint64)[keep])
+
+    def _flush(self) -> None:
+        key_codes, taxa, offsets = self._buffer
+        if key_codes:
+            self.key_chunks.append(np.array(key_codes, dtype=np.int32))
+            self.taxon_chunks.append(np.array(taxa, dtype=np.int64))
+            self.offset_chunks.append(np.array(offsets, dtype=np.uint64))
+        self._buffer = ([], [], [])
+
+    def save(self, index_dir: Union[str, Path, None] = None) -> Path:
+        """
+        Sort the entries by (key, offset) and write them as memory-mappable arrays.
+
+        Returns:
+            Path: The index directory
+        """
+        index_dir = Path(index_dir) if index_dir else default_index_dir(self.source_file)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        self._flush()
+        key_codes = np.concatenate(self.key_chunks) if self.key_chunks else np.array([], dtype=np.int32)
+        taxa = np.concatenate(self.taxon_chunks) if self.taxon_chunks else np.array([], dtype=np.int64)
+        offsets = np.concatenate(self.offset_chunks) if self.offset_chunks else np.array([], dtype=np.uint64)
+        self.key_chunks, self.taxon_chunks, self.offset_chunks = [], [], []
+
+        # Sort by the rank of each normalized key, then look the sorted keys up once
+        sorted_keys, key_ranks = np.unique(
+            np.array([key.encode('utf-8') for key in self.keys] or [b''], dtype=bytes), return_inverse=True)
+        entry_ranks = key_ranks.ravel()[key_codes]
+        order = np.lexsort((offsets, entry_ranks))
+        keys = sorted_keys[entry_ranks[order]]
+
+        np.save(index_dir / 'keys.npy', keys)
+        np.save(index_dir / 'taxa.npy', taxa[order])
+        np.save(index_dir / 'offsets.npy', offsets[order])
+
+        source_stat = os.stat(self.source_file)
+        with open(index_dir / 'index_metadata.json', 'w') as f:
+            json.dump({
+                'source_file': str(self.source_file),
+                'source_size': source_stat.st_size,
+                'source_mtime': source_stat.st_mtime,
+                'entries': len(keys)
+            }, f, indent=2)
+
+        print(f"\nIndexed {len(keys)} interactor entries of {self.source_file} into {index_dir}")
+        return index_dir
+
+
+class MitabIndex:
+    """Look up the raw MITAB rows of a gene through a memory-mapped index and source file."""
+
+    def __init__(self, index_dir: Union[str, Path]):
+        index_dir = Path(index_dir)
+        for name in INDEX_ARRAYS:
+            setattr(self, name, np.load(index_dir / f'{name}.npy', mmap_mode='r'))
+        with open(index_dir / 'index_metadata.json') as f:
+            self.metadata = json.load(f)
+
+        self.source_file = Path(self.metadata['source_file'])
+        source_stat = os.stat(self.source_file)
+        if (source_stat.st_size != self.metadata['source_size']
+                or source_stat.st_mtime != self.metadata['source_mtime']):
+            print(f"Warning: {self.source_file} changed since it was indexed; rebuild the index")
+
+        self._file = open(self.source_file, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def offsets_for(self, gene_id: str, taxon_id: Optional[str] = None,
+                    taxa: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Sorted, distinct byte offsets of rows with gene_id as an interactor."""
+        key = normalize_interactor_id(gene_id).encode('utf-8')
+        start = np.searchsorted(self.keys, key, side='left')
+        end = np.searchsorted(self.keys, key, side='right')
+        offsets = np.asarray(self.offsets[start:end])
+        if taxon_id is not None:
+            offsets = offsets[np.asarray(self.taxa[start:end]) == int(str(taxon_id).split(':')[-1])]
+        elif taxa is not None:
+            offsets = offsets[np.isin(self.taxa[start:end], [parse_taxon_id(taxon) for taxon in taxa])]
+        return np.unique(offsets)
+
+    def read_row(self, offset: int) -> str:
+        """Read the raw row starting at a byte offset, without its line ending."""
+        offset = int(offset)
+        end = self._mmap.find(b'\n', offset)
+        if end == -1:
+            end = len(self._mmap)
+        return self._mmap[offset:end].decode('utf-8').rstrip('\r')
+
+    def lookup(self, gene_ids: Union[str, List[str]], taxon_id: Optional[str] = None,
+               taxa: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Raw evidence rows in which any of gene_ids is interactor A or B.
+
+        Args:
+            gene_ids: One ID or several (e.g. a canonical ID and its synonyms),
+                with or without a 'database:' prefix, in any case
+            taxon_id: Only rows where that interactor has this taxon ID
+            taxa: Only rows where that interactor has one of these taxon IDs
+                (ignored when taxon_id is given)
+
+        Returns:
+            List[str]: Raw rows in file order
+        """
+        if isinstance(gene_ids, str):
+            gene_ids = [gene_ids]
+        offsets = np.unique(np.concatenate(
+            [self.offsets_for(gene_id, taxon_id, taxa) for gene_id in gene_ids] or [np.array([], dtype=np.uint64)]
+        ))
+        return [self.read_row(offset) for offset in offsets]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the raw MITAB rows of a gene")
+    parser.add_argument('gene_ids', nargs='+', help="Interactor IDs, e.g. WBGene00002996 or wormbase:WBGene00002996")
+    parser.add_argument('--source', choices=sorted(MITAB_FILES), default='gen',
+                        help="Molecular (mol) or genetic (gen) interactions")
+    parser.add_argument('--taxon', default=None, help="Restrict to this taxon ID")
+    parser.add_argument('--index-dir', type=Path, default=None,
+                        help="Index directory (default: the index of --source, or its subset copy)")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+
+    index_dir = args.index_dir or subset_input_path(default_index_dir(MITAB_FILES[args.source]),
+                                                     args.taxa, args.databases)
+    # A full-release index is filtered to the subset taxa at lookup time
+    taxa = get_subset_taxa(load_species_map(), args.taxa, args.databases)
+    with MitabIndex(index_dir) as index:
+        rows = index.lookup(args.gene_ids, taxon_id=args.taxon, taxa=taxa)
+        for row in rows:
+            print(row)
+        print(f"\n{len(rows)} rows")
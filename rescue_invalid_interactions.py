@@ -0,0 +1,249 @@
+import argparse
+import csv
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Tuple
+from utils.species_utils import (
+    load_species_map,
+    add_subset_arguments,
+    normalize_taxa,
+    normalize_databases,
+    subset_input_path,
+    subset_output_path
+)
+from validate_gene_interactions import build_gene_keys, filter_gene_nodes, filter_interactions
+from GeneInteractionProcessor import SYNONYMS_FILE, load_gene_synonyms
+
+# Define constants
+GENE_NODES_FILE = Path('data/processed/GeneDescriptions/gene_nodes.csv')
+PROCESSED_DIR = Path('data/processed/GeneticInteractions')
+INVALID_FILE = PROCESSED_DIR / 'invalid_interactions.csv'
+STATS_FILE = PROCESSED_DIR / 'interactions_stats.csv'
+RESCUED_FILE = PROCESSED_DIR / 'rescued_interactions.csv'
+REMAINING_FILE = PROCESSED_DIR / 'invalid_interactions_remaining.csv'
+RESCUED_STATS_FILE = PROCESSED_DIR / 'interactions_stats_rescued.csv'
+
+# Lookup tables tried in order; the first table that resolves an ID wins
+RESCUE_METHODS = ['id', 'synonym', 'symbol', 'unversioned_id']
+
+
+def normalize_ids(ids: pd.Series) -> pd.Series:
+    """Lowercase IDs and drop a leading 'database:' prefix."""
+    return (ids.astype(str).str.strip().str.lower()
+            .str.replace(r'^[^:]*:', '', regex=True))
+
+
+def strip_versions(ids: pd.Series) -> pd.Series:
+    """Drop a trailing '.N' version suffix from normalized IDs."""
+    return ids.str.replace(r'\.\d+$', '', regex=True)
+
+
+def _lookup_keys(taxon_ids: pd.Series, values: pd.Series) -> pd.Series:
+    return taxon_ids.astype(str) + '\t' + values
+
+
+def _unique_lookup(lookup_keys: pd.Series, gene_keys: pd.Series) -> pd.Series:
+    """
+    Build a lookup Series from candidate (lookup key, gene key) pairs.
+
+    Lookup keys that point at more than one gene are ambiguous and left out.
+    """
+    pairs = pd.DataFrame({'lookup': lookup_keys.to_numpy(), 'gene_key': gene_keys.to_numpy()})
+    pairs = pairs.dropna().drop_duplicates()
+    ambiguous = pairs['lookup'].duplicated(keep=False)
+    return pairs[~ambiguous].set_index('lookup')['gene_key']
+
+
+def build_lookup_tables(gene_nodes: pd.DataFrame, gene_synonyms: dict) -> Dict[str, pd.Series]:
+    """
+    Precompute the ID, synonym, symbol and unversioned-ID lookup tables.
+
+    Every table maps 'taxonId<TAB>normalized value' to a canonical
+    'database:geneId:taxonId' gene key.
+
+    Args:
+        gene_nodes: gene_nodes with gene_key and taxonId columns
+        gene_synonyms: Gene synonyms dictionary keyed by taxon ID
+
+    Returns:
+        Dict[str, pd.Series]: One lookup Series per entry in RESCUE_METHODS
+    """
+    normalized = normalize_ids(gene_nodes['geneId'])
+    id_keys = _lookup_keys(gene_nodes['taxonId'], normalized)
+
+    # Canonical IDs in gene_synonyms are gene IDs of the same taxon; resolve them to gene keys
+    id_table = _unique_lookup(id_keys, gene_nodes['gene_key'])
+    synonym_rows = [
+        (taxon_id, canonical_id, synonym)
+        for taxon_id, genes in gene_synonyms.items()
+        for canonical_id, synonyms in genes.items()
+        for synonym in synonyms
+    ]
+    synonyms = pd.DataFrame(synonym_rows, columns=['taxonId', 'canonicalId', 'synonym'])
+    synonym_gene_keys = _lookup_keys(synonyms['taxonId'], normalize_ids(synonyms['canonicalId'])).map(id_table)
+
+    return {
+        'id': id_table,
+        'synonym': _unique_lookup(
+            _lookup_keys(synonyms['taxonId'], normalize_ids(synonyms['synonym'])), synonym_gene_keys),
+        'symbol': _unique_lookup(
+            _lookup_keys(gene_nodes['taxonId'], gene_nodes['Symbol'].astype(str).str.strip().str.lower()),
+            gene_nodes['gene_key']),
+        'unversioned_id': _unique_lookup(
+            _lookup_keys(gene_nodes['taxonId'], strip_versions(normalized)), gene_nodes['gene_key']),
+    }
+
+
+def resolve_gene_ids(taxon_ids: pd.Series, gene_ids: pd.Series,
+                     lookup_tables: Dict[str, pd.Series]) -> Tuple[pd.Series, pd.Series]:
+    """
+    Resolve gene IDs to canonical gene keys in bulk.
+
+    Each distinct (taxon, ID) pair is looked up once, whatever its row count.
+
+    Returns:
+        tuple: (resolved gene key or NaN, name of the table that resolved it or NaN)
+    """
+    normalized = normalize_ids(gene_ids)
+    queries = pd.DataFrame({
+        'id': _lookup_keys(taxon_ids, normalized),
+        'unversioned_id': _lookup_keys(taxon_ids, strip_versions(normalized)),
+    })
+    queries['synonym'] = queries['id']
+    queries['symbol'] = queries['id']
+
+    distinct = queries.drop_duplicates('id').set_index('id', drop=False)
+    resolved = pd.Series(index=distinct.index, dtype=object)
+    method = pd.Series(index=distinct.index, dtype=object)
+    for name in RESCUE_METHODS:
+        pending = resolved.isna()
+        if not pending.any():
+            break
+        hits = distinct.loc[pending, name].map(lookup_tables[name]).dropna()
+        resolved[hits.index] = hits
+        method[hits.index] = name
+
+    return queries['id'].map(resolved), queries['id'].map(method)
+
+
+def rescue_interactions(invalid: pd.DataFrame, valid_genes: set,
+                        lookup_tables: Dict[str, pd.Series]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split invalid interactions into rescued and still-invalid rows.
+
+    Endpoints whose key is already valid are kept as they are. The others are
+    resolved through the lookup tables. A row is rescued when both endpoints
+    end up with a valid gene key.
+
+    Returns:
+        tuple: (rescued interactions with updated keys, remaining invalid interactions)
+    """
+    invalid = invalid.copy()
+    endpoint_methods = {}
+    for side in ('from', 'to'):
+        key_col, id_col = f'{side}_key', f'{side}GeneId'
+        already_valid = invalid[key_col].isin(valid_genes)
+        resolved, method = resolve_gene_ids(invalid['taxonId'], invalid[id_col], lookup_tables)
+        invalid[f'new_{key_col}'] = invalid[key_col].where(already_valid, resolved)
+        endpoint_methods[side] = method.where(~already_valid, 'valid')
+
+    rescued_mask = invalid['new_from_key'].notna() & invalid['new_to_key'].notna()
+    remaining = invalid.loc[~rescued_mask, [c for c in invalid.columns if not c.startswith('new_')]]
+
+    rescued = invalid[rescued_mask].copy()
+    rescued['from_rescue'] = endpoint_methods['from'][rescued_mask]
+    rescued['to_rescue'] = endpoint_methods['to'][rescued_mask]
+    rescued['from_key'] = rescued.pop('new_from_key')
+    rescued['to_key'] = rescued.pop('new_to_key')
+    if rescued.empty:
+        return rescued, remaining
+
+    from_parts = rescued['from_key'].str.split(':', n=1, expand=True)
+    rescued['database'] = from_parts[0]
+    rescued['fromGeneId'] = from_parts[1].str.rsplit(':', n=1).str[0]
+    rescued['toGeneId'] = rescued['to_key'].str.split(':', n=1).str[1].str.rsplit(':', n=1).str[0]
+
+    return rescued, remaining
+
+
+def update_stats(stats: pd.DataFrame, rescued: pd.DataFrame, invalid: pd.DataFrame) -> pd.DataFrame:
+    """
+    Move rescued interactions from the invalid to the valid counts of the stats table.
+
+    Counts are attributed to the taxon and database the rows had in the invalid file.
+    """
+    original = invalid.loc[rescued.index, ['taxonId', 'database']]
+    shifts = [('overall', 'all', 'all', len(original))]
+    shifts += [('taxon', taxon_id, 'all', count)
+               for taxon_id, count in original.groupby('taxonId').size().items()]
+    shifts += [('database', taxon_id, database, count)
+               for (taxon_id, database), count in original.groupby(['taxonId', 'database']).size().items()]
+
+    stats = stats.copy()
+    for level, taxon_id, database, count in shifts:
+        row = (stats['level'] == level) & (stats['taxon_id'] == str(taxon_id)) & (stats['database'] == database)
+        stats.loc[row & (stats['interaction_type'] == 'valid'), 'count'] += count
+        stats.loc[row & (stats['interaction_type'] == 'invalid'), 'count'] -= count
+    return stats
+
+
+def rescue_invalid_interactions(taxa=None, databases=None):
+    """
+    Recover invalid interactions through symbol, normalized-ID and synonym lookups.
+
+    Reads only invalid_interactions.csv and the lookup sources. The valid set and
+    the raw MITAB files are not touched. Writes the rescued edges, the remaining
+    invalid rows and an updated copy of the statistics. taxa and databases restrict
+    the run to those taxon IDs and databases; subset runs read the files of an
+    earlier run of the same subset and write under data/processed/subsets/.
+    """
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+
+    species_map = load_species_map()
+    gene_nodes = pd.read_csv(subset_input_path(GENE_NODES_FILE, taxa, databases),
+                             quoting=csv.QUOTE_ALL, dtype=str)
+    gene_nodes['gene_key'] = build_gene_keys(gene_nodes, species_map)
+    gene_nodes = filter_gene_nodes(gene_nodes, taxa, databases)
+    valid_genes = set(gene_nodes['gene_key'])
+
+    gene_synonyms = load_gene_synonyms(subset_input_path(SYNONYMS_FILE, taxa, databases))
+    lookup_tables = build_lookup_tables(gene_nodes, gene_synonyms)
+    for name in RESCUE_METHODS:
+        print(f"{name} lookup entries: {len(lookup_tables[name])}")
+
+    invalid = pd.read_csv(subset_input_path(INVALID_FILE, taxa, databases), low_memory=False,
+                          dtype={'database': str, 'taxonId': str, 'fromGeneId': str, 'toGeneId': str})
+    invalid = filter_interactions(invalid, taxa, databases)
+    rescued, remaining = rescue_interactions(invalid, valid_genes, lookup_tables)
+
+    stats = pd.read_csv(subset_input_path(STATS_FILE, taxa, databases), dtype={'taxon_id': str})
+    rescued_stats = update_stats(stats, rescued, invalid)
+
+    rescued_file = subset_output_path(RESCUED_FILE, taxa, databases)
+    remaining_file = subset_output_path(REMAINING_FILE, taxa, databases)
+    rescued_stats_file = subset_output_path(RESCUED_STATS_FILE, taxa, databases)
+    rescued.to_csv(rescued_file, index=False)
+    remaining.to_csv(remaining_file, index=False)
+    rescued_stats.to_csv(rescued_stats_file, index=False)
+
+    print(f"\nInvalid interactions: {len(invalid)}")
+    print(f"Rescued interactions: {len(rescued)}")
+    print(f"Still invalid: {len(remaining)}")
+    if len(rescued) > 0:
+        print("\nRescued endpoints by method:")
+        print(pd.concat([rescued['from_rescue'], rescued['to_rescue']]).value_counts().to_string())
+
+    print(f"\nFiles saved:")
+    print(f"Rescued interactions: {rescued_file}")
+    print(f"Remaining invalid interactions: {remaining_file}")
+    print(f"Updated statistics: {rescued_stats_file}")
+
+    return rescued
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rescue invalid interactions through ID, synonym and symbol lookups")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+    rescue_invalid_interactions(taxa=args.taxa, databases=args.databases)
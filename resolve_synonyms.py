@@ -0,0 +1,172 @@
+import argparse
+import json
+import pandas as pd
+from typing import Dict, List, Tuple
+from utils.species_utils import (
+    load_species_map,
+    add_subset_arguments,
+    get_subset_taxa,
+    subset_input_path,
+    subset_output_path
+)
+
+# Define constants
+SYNONYMS_FILE = 'data/processed/gene_synonyms.json'
+SYNONYM_MAP_FILE = 'data/processed/gene_synonym_map.json'
+CONFLICTS_FILE = 'data/processed/synonym_conflicts.csv'
+
+
+class UnionFind:
+    """Disjoint-set forest over integer node IDs with path halving and union by size."""
+
+    def __init__(self):
+        self.parent = []
+        self.size = []
+
+    def add(self) -> int:
+        """Create a new singleton set and return its node ID."""
+        self.parent.append(len(self.parent))
+        self.size.append(1)
+        return len(self.parent) - 1
+
+    def find(self, node: int) -> int:
+        """Return the root of the set containing node."""
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a: int, b: int) -> int:
+        """Merge the sets containing a and b and return the new root."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+def resolve_taxon_synonyms(genes: Dict[str, dict]) -> Tuple[Dict[str, str], List[dict]]:
+    """
+    Resolve the synonyms of one taxon into equivalence classes.
+
+    Every canonical ID is merged with each of its synonyms. The representative
+    of a class is its lexicographically smallest canonical ID, so the result
+    does not depend on dict order. Canonical IDs always map to themselves and
+    a synonym maps to the canonical ID that lists it, or to the smallest of
+    the canonical IDs listing it. The classes themselves only feed the
+    conflict report.
+
+    Args:
+        genes: canonical_id -> {synonym: db} for one taxon, as in gene_synonyms.json
+
+    Returns:
+        tuple: (synonym -> canonical ID for every synonym that is not itself a
+        canonical ID, list of conflicts for classes holding several canonical IDs)
+    """
+    uf = UnionFind()
+    node_ids = {}
+    owners = {}
+
+    def node(name):
+        if name not in node_ids:
+            node_ids[name] = uf.add()
+        return node_ids[name]
+
+    for canonical_id, synonyms in genes.items():
+        canonical_node = node(canonical_id)
+        owners.setdefault(canonical_id, set()).add(canonical_id)
+        for synonym in synonyms:
+            uf.union(canonical_node, node(synonym))
+            owners.setdefault(synonym, set()).add(canonical_id)
+
+    # Deterministic representative and member canonical IDs per class
+    class_canonicals = {}
+    for canonical_id in genes:
+        class_canonicals.setdefault(uf.find(node_ids[canonical_id]), []).append(canonical_id)
+    representatives = {root: min(canonicals) for root, canonicals in class_canonicals.items()}
+
+    # A synonym maps to the canonical ID that lists it, or to the smallest of several;
+    # the class representative is only used for the conflict report
+    synonym_map = {}
+    for name, canonical_owners in owners.items():
+        if name in genes:
+            continue
+        synonym_map[name] = min(canonical_owners)
+
+    # IDs listed under more than one canonical ID are what merged the classes
+    linking_ids = {}
+    for name, canonical_owners in owners.items():
+        if len(canonical_owners) > 1:
+            linking_ids.setdefault(uf.find(node_ids[name]), []).append(name)
+
+    conflicts = []
+    for root, canonicals in class_canonicals.items():
+        if len(canonicals) < 2:
+            continue
+        conflicts.append({
+            'representative': representatives[root],
+            'canonical_ids': sorted(canonicals),
+            'linking_ids': sorted(linking_ids.get(root, []))
+        })
+
+    return synonym_map, conflicts
+
+
+def resolve_synonyms(gene_synonyms: Dict[str, dict]) -> Tuple[Dict[str, Dict[str, str]], pd.DataFrame]:
+    """
+    Resolve every taxon of a gene synonyms dictionary.
+
+    Args:
+        gene_synonyms: taxon_id -> canonical_id -> {synonym: db}
+
+    Returns:
+        tuple: (taxon_id -> {synonym: canonical ID}, conflicts DataFrame with
+        taxon_id, representative, canonical_ids and linking_ids columns)
+    """
+    synonym_maps = {}
+    conflict_rows = []
+    for taxon_id in sorted(gene_synonyms):
+        synonym_map, conflicts = resolve_taxon_synonyms(gene_synonyms[taxon_id])
+        synonym_maps[taxon_id] = synonym_map
+        for conflict in conflicts:
+            conflict_rows.append({
+                'taxon_id': taxon_id,
+                'representative': conflict['representative'],
+                'canonical_ids': '|'.join(conflict['canonical_ids']),
+                'linking_ids': '|'.join(conflict['linking_ids'])
+            })
+
+    conflicts_df = pd.DataFrame(conflict_rows,
+                                columns=['taxon_id', 'representative', 'canonical_ids', 'linking_ids'])
+    return synonym_maps, conflicts_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve gene synonyms into a synonym -> canonical ID map")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+
+    with open(subset_input_path(SYNONYMS_FILE, args.taxa, args.databases)) as f:
+        gene_synonyms = json.load(f)
+    # Synonyms are organized per taxon, so databases map to the taxa that use them
+    taxa = get_subset_taxa(load_species_map(), args.taxa, args.databases)
+    if taxa is not None:
+        gene_synonyms = {taxon_id: genes for taxon_id, genes in gene_synonyms.items() if taxon_id in taxa}
+
+    synonym_maps, conflicts = resolve_synonyms(gene_synonyms)
+
+    synonym_map_file = subset_output_path(SYNONYM_MAP_FILE, args.taxa, args.databases)
+    conflicts_file = subset_output_path(CONFLICTS_FILE, args.taxa, args.databases)
+    with open(synonym_map_file, 'w') as f:
+        json.dump(synonym_maps, f, indent=2, sort_keys=True)
+    conflicts.to_csv(conflicts_file, index=False)
+
+    print(f"Resolved {sum(len(m) for m in synonym_maps.values())} synonyms "
+          f"across {len(synonym_maps)} taxa")
+    print(f"Ambiguous merges (classes with several canonical IDs): {len(conflicts)}")
+    print(f"\nSaved synonym map to {synonym_map_file}")
+    print(f"Saved conflicts to {conflicts_file}")
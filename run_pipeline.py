@@ -0,0 +1,102 @@
+import argparse
+from utils.species_utils import load_species_map, add_subset_arguments, get_subset_taxa, subset_output_path
+from CombineAllGeneDescription import INPUT_DIRECTORY, OUTPUT_DIRECTORY, build_gene_nodes, write_gene_nodes
+from getSynym import (
+    MOL_INTERACTIONS_FILE,
+    SYNONYMS_OUTPUT_FILE,
+    gene_descriptions_from_nodes,
+    process_interaction_file,
+    save_gene_synonyms
+)
+from GeneInteractionProcessor import (
+    CHUNK_SIZE,
+    EXAMPLES_PER_DATABASE,
+    DataValidationError,
+    process_interactions,
+    write_interactions
+)
+from validate_gene_interactions import validate_gene_interactions
+
+
+def run_pipeline(write_intermediates: bool = False,
+                 dedup: bool = False,
+                 examples_per_database: int = EXAMPLES_PER_DATABASE,
+                 pipelined: bool = False,
+                 workers: int = None,
+                 chunk_size: int = CHUNK_SIZE,
+                 taxa=None,
+                 databases=None):
+    """
+    Run CombineAllGeneDescription -> getSynym -> GeneInteractionProcessor ->
+    validate_gene_interactions in one process, passing data between stages in memory.
+
+    Only the final valid/invalid/stats files are always written. gene_nodes.csv,
+    gene_synonyms.json and extracted_genetic_interactions.csv are written only
+    when write_intermediates is set. taxa and databases restrict every stage
+    to those taxon IDs and databases; such subset runs write under
+    data/processed/subsets/ instead of over the full-release files.
+
+    Returns:
+        pd.DataFrame: Valid interactions
+    """
+    species_map = load_species_map()
+    # The synonym stage is organized per taxon, so databases narrow it to the taxa using them
+    synonym_taxa = get_subset_taxa(species_map, taxa, databases)
+
+    print("\n=== Combining gene descriptions ===")
+    gene_nodes, description_metadata = build_gene_nodes(INPUT_DIRECTORY, taxa, databases)
+
+    print("\n=== Building gene synonyms ===")
+    gene_descriptions = gene_descriptions_from_nodes(gene_nodes, species_map, synonym_taxa)
+    _, gene_synonyms = process_interaction_file(MOL_INTERACTIONS_FILE, gene_descriptions, synonym_taxa)
+
+    print("\n=== Processing genetic interactions ===")
+    interactions, interaction_metadata = process_interactions(
+        gene_synonyms,
+        dedup=dedup,
+        examples_per_database=examples_per_database,
+        pipelined=pipelined,
+        workers=workers,
+        chunk_size=chunk_size,
+        taxa=taxa,
+        databases=databases
+    )
+
+    if write_intermediates:
+        write_gene_nodes(gene_nodes, description_metadata, subset_output_path(OUTPUT_DIRECTORY, taxa, databases))
+        save_gene_synonyms(gene_synonyms, subset_output_path(SYNONYMS_OUTPUT_FILE, taxa, databases))
+        write_interactions(interactions, interaction_metadata, taxa, databases)
+
+    print("\n=== Validating gene interactions ===")
+    return validate_gene_interactions(gene_nodes=gene_nodes, interactions=interactions,
+                                      taxa=taxa, databases=databases)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the full gene interaction pipeline in one process")
+    parser.add_argument('--write-intermediates', action='store_true',
+                        help="Also write gene_nodes.csv, gene_synonyms.json and extracted_genetic_interactions.csv")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Collapse duplicate gene pairs into one edge with an evidenceCount column")
+    parser.add_argument('--examples', type=int, default=EXAMPLES_PER_DATABASE,
+                        help="Number of example interactions stored per taxon and database in the metadata")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Overlap reading and transforming of genetic interaction chunks")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --pipeline (default: all CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Rows per processing chunk")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+    try:
+        run_pipeline(write_intermediates=args.write_intermediates,
+                     dedup=args.dedup,
+                     examples_per_database=args.examples,
+                     pipelined=args.pipeline,
+                     workers=args.workers,
+                     chunk_size=args.chunk_size,
+                     taxa=args.taxa,
+                     databases=args.databases)
+    except (AssertionError, DataValidationError) as e:
+        print(f"Error: {e}")
+        exit(1)
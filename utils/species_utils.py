@@ -1,6 +1,10 @@
 import json
 from pathlib import Path
-from typing import Dict, Union, List
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# Subset runs (--taxa/--databases) write under SUBSET_ROOT instead of over the full-release outputs
+PROCESSED_ROOT = Path('data/processed')
+SUBSET_ROOT = PROCESSED_ROOT / 'subsets'
 
 def load_species_map() -> Dict[str, Dict[str, str]]:
     """
@@ -100,4 +104,178 @@ def get_valid_species_codes() -> List[str]:
         List[str]: List of valid taxon IDs
     """
     species_map = load_species_map()
-    return sorted(list(species_map.keys()))
\ No newline at end of file
+    return sorted(list(species_map.keys()))
+
+def build_species_to_taxon(species_map: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """
+    Map lowercase species short names and database names to taxon IDs.
+    
+    Args:
+        species_map: The loaded species map dictionary
+    
+    Returns:
+        Dict[str, str]: Dictionary mapping short names and db names to taxon IDs
+    """
+    # Map species names to taxon IDs using db_name instead of name
+    species_to_taxon = {}
+    for taxon_id, info in species_map.items():
+        db_name = info['db_name']
+        species_name = info['short_name'].lower()
+        species_to_taxon[species_name] = taxon_id
+        species_to_taxon[db_name] = taxon_id  # Also map database names to taxon IDs
+    return species_to_taxon
+
+def add_subset_arguments(parser) -> None:
+    """
+    Add the --taxa and --databases subset filters to an argparse parser.
+    
+    Args:
+        parser: argparse.ArgumentParser of a pipeline stage
+    """
+    parser.add_argument('--taxa', nargs='+', default=None,
+                        help="Only process these NCBI taxon IDs (e.g. 7955 or taxid:7955)")
+    parser.add_argument('--databases', nargs='+', default=None,
+                        help="Only process these databases (species map db names, e.g. zfin)")
+
+def normalize_taxa(taxa: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    """
+    Normalize a taxa filter to bare taxon IDs.
+    
+    Args:
+        taxa: Taxon IDs, optionally prefixed with 'taxid:' or 'NCBITaxon:'
+    
+    Returns:
+        Optional[Set[str]]: Set of taxon IDs, or None when no filter is given
+    """
+    if not taxa:
+        return None
+    return {str(taxon).split(':')[-1].strip() for taxon in taxa}
+
+def normalize_databases(databases: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    """
+    Normalize a databases filter to lowercase database names.
+    
+    Args:
+        databases: Database names
+    
+    Returns:
+        Optional[Set[str]]: Set of lowercase names, or None when no filter is given
+    """
+    if not databases:
+        return None
+    return {database.strip().lower() for database in databases}
+
+def get_subset_taxa(species_map: Dict[str, Dict[str, str]],
+                    taxa: Optional[Iterable[str]],
+                    databases: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    """
+    Combine taxa and databases filters into the set of taxon IDs to keep.
+    
+    Databases are translated to the taxa whose species map db_name matches.
+    Used by stages that are organized per taxon rather than per database.
+    
+    Args:
+        species_map: The loaded species map dictionary
+        taxa: Taxon IDs filter
+        databases: Database names filter
+    
+    Returns:
+        Optional[Set[str]]: Taxon IDs to keep, or None when no filter is given
+    """
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+    if databases is not None:
+        database_taxa = {taxon_id for taxon_id, info in species_map.items()
+                         if info['db_name'].lower() in databases}
+        taxa = database_taxa if taxa is None else taxa & database_taxa
+    return taxa
+
+def taxid_markers(taxa: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Substrings that any MITAB line of the given taxa must contain.
+    
+    A line without any marker can be rejected before it is split. A match is
+    only a candidate ('taxid:7955' also matches 'taxid:79551'), so callers
+    still check the parsed taxon ID.
+    
+    Args:
+        taxa: Taxon IDs filter
+    
+    Returns:
+        Optional[Tuple[str, ...]]: Markers such as 'taxid:7955', or None when no filter is given
+    """
+    taxa = normalize_taxa(taxa)
+    if taxa is None:
+        return None
+    return tuple(f'taxid:{taxon}' for taxon in sorted(taxa))
+
+def subset_label(taxa: Optional[Iterable[str]], databases: Optional[Iterable[str]]) -> Optional[str]:
+    """
+    Directory name identifying a subset run, e.g. 'taxa-7955_databases-zfin'.
+    
+    Args:
+        taxa: Taxon IDs filter
+        databases: Database names filter
+    
+    Returns:
+        Optional[str]: The label, or None when no filter is given
+    """
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+    parts = []
+    if taxa is not None:
+        parts.append('taxa-' + '-'.join(sorted(taxa)))
+    if databases is not None:
+        parts.append('databases-' + '-'.join(sorted(databases)))
+    return '_'.join(parts) or None
+
+def subset_output_path(path: Union[str, Path],
+                       taxa: Optional[Iterable[str]] = None,
+                       databases: Optional[Iterable[str]] = None) -> Path:
+    """
+    Where a stage writes a processed file, so subset runs never overwrite full-release outputs.
+    
+    Full runs write to path itself. Subset runs write to the same path relative
+    to data/processed under data/processed/subsets/<subset_label>/, e.g.
+    data/processed/subsets/taxa-7955/GeneticInteractions/valid_interactions.csv.
+    The parent directory is created.
+    
+    Args:
+        path: Full-release path under data/processed
+        taxa: Taxon IDs filter
+        databases: Database names filter
+    
+    Returns:
+        Path: Output path for this run
+    """
+    path = Path(path)
+    label = subset_label(taxa, databases)
+    if label is not None:
+        path = SUBSET_ROOT / label / path.relative_to(PROCESSED_ROOT)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+def subset_input_path(path: Union[str, Path],
+                      taxa: Optional[Iterable[str]] = None,
+                      databases: Optional[Iterable[str]] = None) -> Path:
+    """
+    Where a stage reads a processed file written by an earlier stage.
+    
+    Subset runs read the file an earlier stage of the same subset wrote and
+    fall back to the full-release file, which the readers filter to the subset.
+    
+    Args:
+        path: Full-release path under data/processed
+        taxa: Taxon IDs filter
+        databases: Database names filter
+    
+    Returns:
+        Path: Input path for this run
+    """
+    path = Path(path)
+    label = subset_label(taxa, databases)
+    if label is not None:
+        subset_path = SUBSET_ROOT / label / path.relative_to(PROCESSED_ROOT)
+        if subset_path.exists():
+            return subset_path
+    return path
@@ -1,32 +1,120 @@
+import argparse
 import pandas as pd
 from pathlib import Path
-from utils.species_utils import load_species_map
+from utils.species_utils import (
+    load_species_map,
+    build_species_to_taxon,
+    add_subset_arguments,
+    normalize_taxa,
+    normalize_databases,
+    subset_input_path,
+    subset_output_path
+)
 import csv
 
-def validate_gene_interactions():
+GENE_NODES_FILE = 'data/processed/GeneDescriptions/gene_nodes.csv'
+EXTRACTED_INTERACTIONS_FILE = 'data/processed/GeneticInteractions/extracted_genetic_interactions.csv'
+OUTPUT_DIR = 'data/processed/GeneticInteractions'
+
+# Rows per chunk when reading the extracted interactions with a subset filter
+FILTER_CHUNK_SIZE = 500000
+
+def load_gene_nodes(gene_nodes_file=GENE_NODES_FILE):
+    """Read gene_nodes.csv written by CombineAllGeneDescription."""
+    # Read gene_nodes with double quotes (since they're quoted in the file)
+    return pd.read_csv(gene_nodes_file, 
+                       low_memory=False,
+                       quoting=csv.QUOTE_ALL)
+
+def filter_interactions(interactions, taxa=None, databases=None):
+    """Keep only interactions of the given taxon IDs and (lowercase) databases."""
+    if taxa is not None:
+        interactions = interactions[interactions['taxonId'].isin(taxa)]
+    if databases is not None:
+        interactions = interactions[interactions['database'].str.lower().isin(databases)]
+    return interactions
+
+def filter_gene_nodes(gene_nodes, taxa=None, databases=None):
+    """Keep only gene nodes (with a gene_key column) of the given taxon IDs and (lowercase) databases."""
+    if taxa is not None:
+        gene_nodes = gene_nodes[gene_nodes['taxonId'].isin(taxa)]
+    if databases is not None:
+        gene_nodes = gene_nodes[gene_nodes['gene_key'].str.split(':', n=1).str[0].isin(databases)]
+    return gene_nodes
+
+def load_extracted_interactions(taxa=None, databases=None):
+    """
+    Read extracted_genetic_interactions.csv written by GeneInteractionProcessor.
+
+    With a taxa or databases filter the file is read in chunks and each chunk
+    is filtered as it is read, so non-matching rows are never accumulated.
+    Subset runs read the file of an earlier run of the same subset if there is one.
+    """
+    interactions_file = subset_input_path(EXTRACTED_INTERACTIONS_FILE, taxa, databases)
+    # Read interactions with no special quoting (since they're plain CSV).
+    # Deduplicated extracts carry an extra evidenceCount column, so take the header from the file.
+    read_options = dict(low_memory=False,
+                        dtype={'database': str, 'taxonId': str, 'fromGeneId': str, 'toGeneId': str})
+    if taxa is None and databases is None:
+        return pd.read_csv(interactions_file, **read_options)
+
+    chunks = pd.read_csv(interactions_file, chunksize=FILTER_CHUNK_SIZE, **read_options)
+    return pd.concat([filter_interactions(chunk, taxa, databases) for chunk in chunks], ignore_index=True)
+
+def build_gene_keys(gene_nodes, species_map):
+    """
+    Build the composite 'database:geneId:taxonId' key for every gene node.
+
+    Adds a taxonId column to gene_nodes (mapped from the Species column, falling
+    back to the database column) and returns the key as a Series.
+    """
+    species_to_taxon = build_species_to_taxon(species_map)
+
+    # Map taxon IDs for gene_nodes, trying both Species and database fields
+    gene_nodes['taxonId'] = gene_nodes['Species'].str.lower().map(species_to_taxon)
+    # If taxonId is NA, try using the database field
+    mask = gene_nodes['taxonId'].isna()
+    gene_nodes.loc[mask, 'taxonId'] = gene_nodes.loc[mask, 'database'].map(species_to_taxon)
+
+    # Map database names using species map, keeping the node's own database for unknown taxa
+    taxon_db_names = {taxon_id: info['db_name'] for taxon_id, info in species_map.items()}
+    db_names = (gene_nodes['taxonId'].astype(str).map(taxon_db_names)
+                .fillna(gene_nodes['database'].str.lower())
+                .str.lower())
+
+    # Create composite key using mapped database names
+    return (db_names + ':' +
+            gene_nodes['geneId'] + ':' +
+            gene_nodes['taxonId'].astype(str))
+
+def validate_gene_interactions(gene_nodes=None, interactions=None, taxa=None, databases=None):
     """
     Validate that all genes referenced in interactions exist in gene descriptions.
     Returns a DataFrame with only valid interactions where both genes exist.
+
+    gene_nodes and interactions may be passed in memory (e.g. by run_pipeline);
+    any frame not given is read from the processed files. taxa and databases
+    restrict the run to those taxon IDs and databases, and such subset runs
+    write under data/processed/subsets/ (see subset_output_path()).
     """
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+
     # Load data files and species map
     species_map = load_species_map()
     # Fix: species_map now returns Dict[str, Dict[str, str]], so we need to get names differently
     taxon_names = {taxon_id: info['name'] for taxon_id, info in species_map.items()}
     
-    # Read gene_nodes with double quotes (since they're quoted in the file)
-    gene_nodes = pd.read_csv('data/processed/GeneDescriptions/gene_nodes.csv', 
-                            low_memory=False,
-                            quoting=csv.QUOTE_ALL)
+    if gene_nodes is None:
+        gene_nodes = load_gene_nodes(subset_input_path(GENE_NODES_FILE, taxa, databases))
+    else:
+        gene_nodes = gene_nodes.copy()
     
-    # Read interactions with no special quoting (since they're plain CSV)
-    interactions = pd.read_csv('data/processed/GeneticInteractions/extracted_genetic_interactions.csv', 
-                             low_memory=False,
-                             names=['database', 'taxonId', 'fromGeneId', 'toGeneId'])  # Specify column names
-    
-    
-    
-    
-   
+    if interactions is None:
+        interactions = load_extracted_interactions(taxa, databases)
+    else:
+        # Match the CSV round-trip, where empty fields are read back as NA
+        interactions = filter_interactions(interactions, taxa, databases).replace('', pd.NA)
     
     # Add species names to interactions and drop any rows with NA
     interactions['species_name'] = interactions['taxonId'].map(taxon_names)
@@ -43,39 +131,12 @@ def validate_gene_interactions():
     print("\nColumns in gene_nodes DataFrame:")
     print(gene_nodes.columns.tolist())
     
-    # Map species names to taxon IDs using db_name instead of name
-    species_to_taxon = {}
-    for taxon_id, info in species_map.items():
-        db_name = info['db_name']
-        species_name = info['short_name'].lower()
-        species_to_taxon[species_name] = taxon_id
-        species_to_taxon[db_name] = taxon_id  # Also map database names to taxon IDs
-
-    print(species_to_taxon)
-    input("Press Enter to continue...")
-    # Map taxon IDs for gene_nodes, trying both Species and database fields
-    gene_nodes['taxonId'] = gene_nodes['Species'].str.lower().map(species_to_taxon)
-    # If taxonId is NA, try using the database field
-    mask = gene_nodes['taxonId'].isna()
-    gene_nodes.loc[mask, 'taxonId'] = gene_nodes.loc[mask, 'database'].map(species_to_taxon)
-
-    # Map database names using species map
-    def get_db_name(row):
-       
-        species_info = species_map.get(str(row['taxonId']), {})
-        # print(species_info,row)
-        return species_info.get('db_name', row['database'].lower()).lower()
-
-    # Create composite key using mapped database names
-    gene_nodes['gene_key'] = (gene_nodes.apply(get_db_name, axis=1) + ':' + 
-                             gene_nodes['geneId'] + ':' + 
-                             gene_nodes['taxonId'].astype(str))
+    gene_nodes['gene_key'] = build_gene_keys(gene_nodes, species_map)
+    gene_nodes = filter_gene_nodes(gene_nodes, taxa, databases)
     valid_genes = set(gene_nodes['gene_key'])
 
     print("\nFirst few rows of gene_nodes:")
     print(gene_nodes[gene_nodes['Species']=='HGNC'].head())
-
-    input("Press Enter to continue...")
     
     # Create composite keys for interaction genes
     interactions['from_key'] = (interactions['database'].str.lower() + ':' + 
@@ -215,8 +276,9 @@ def validate_gene_interactions():
     stats_df = stats_df[['level', 'taxon_id', 'species_name', 'database', 'interaction_type', 'count']]
     stats_df = stats_df.sort_values(['level', 'taxon_id', 'database', 'interaction_type'])
     
-    # Save files with same format as input
-    base_path = 'data/processed/GeneticInteractions'
+    # Save files with same format as input; subset runs write to their own directory
+    base_path = subset_output_path(OUTPUT_DIR, taxa, databases)
+    base_path.mkdir(parents=True, exist_ok=True)
     valid_output = f'{base_path}/valid_interactions.csv'
     invalid_output = f'{base_path}/invalid_interactions.csv'
     stats_output = f'{base_path}/interactions_stats.csv'
@@ -245,5 +307,166 @@ def validate_gene_interactions():
     
     return valid_interactions
 
+def _sql_string(value):
+    """Quote a value as a SQL string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def validate_gene_interactions_duckdb(threads=None, taxa=None, databases=None):
+    """
+    Validate interactions with DuckDB instead of pandas.
+
+    Reads the same processed files and writes the same valid, invalid and
+    statistics CSVs, to the same paths, as validate_gene_interactions(). Gene-key construction,
+    the validity join and the statistics aggregation run inside DuckDB, which
+    is multi-threaded and spills to disk when the data does not fit in memory.
+
+    Args:
+        threads: Number of DuckDB threads (defaults to all cores)
+        taxa: Only validate interactions of these taxon IDs
+        databases: Only validate interactions of these databases
+
+    Returns:
+        pd.DataFrame: Valid interactions in input order, like validate_gene_interactions()
+    """
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("The duckdb backend requires the duckdb package (pip install duckdb)")
+
+    taxa = normalize_taxa(taxa)
+    databases = normalize_databases(databases)
+    species_map = load_species_map()
+    species = pd.DataFrame(
+        [(taxon_id, info['name'], info['db_name']) for taxon_id, info in species_map.items()],
+        columns=['taxon_id', 'name', 'db_name']
+    )
+    species_lookup = pd.DataFrame(
+        list(build_species_to_taxon(species_map).items()),
+        columns=['lookup_name', 'taxon_id']
+    )
+
+    gene_nodes_file = subset_input_path(GENE_NODES_FILE, taxa, databases)
+    interactions_file = subset_input_path(EXTRACTED_INTERACTIONS_FILE, taxa, databases)
+
+    con = duckdb.connect()
+    if threads:
+        con.execute(f"SET threads TO {int(threads)}")
+    con.register('species', species)
+    con.register('species_lookup', species_lookup)
+
+    # Valid gene keys, built exactly like build_gene_keys()
+    con.execute(f"""
+        CREATE TEMP TABLE gene_keys AS
+        WITH nodes AS (
+            SELECT n.database, n.geneId, coalesce(by_species.taxon_id, by_database.taxon_id) AS taxonId
+            FROM read_csv({_sql_string(gene_nodes_file)}, header = true, all_varchar = true) AS n
+            LEFT JOIN species_lookup AS by_species ON lower(n.Species) = by_species.lookup_name
+            LEFT JOIN species_lookup AS by_database ON n.database = by_database.lookup_name
+        )
+        SELECT DISTINCT
+            lower(coalesce(sp.db_name, lower(nodes.database))) || ':' || nodes.geneId || ':'
+                || coalesce(nodes.taxonId, 'nan') AS gene_key
+        FROM nodes
+        LEFT JOIN species AS sp ON sp.taxon_id = nodes.taxonId
+    """)
+
+    # Load interactions into a table so rowid keeps the input order; subset filters apply during the scan
+    subset_filters = ['true']
+    if taxa is not None:
+        subset_filters.append(f"taxonId IN ({', '.join(map(_sql_string, sorted(taxa)))})")
+    if databases is not None:
+        subset_filters.append(f"lower(database) IN ({', '.join(map(_sql_string, sorted(databases)))})")
+    con.execute(f"""
+        CREATE TEMP TABLE raw_interactions AS
+        SELECT * FROM read_csv({_sql_string(interactions_file)}, header = true, all_varchar = true)
+        WHERE {' AND '.join(subset_filters)}
+    """)
+    columns = [row[0] for row in con.execute("DESCRIBE raw_interactions").fetchall()]
+    not_null = ' AND '.join(f'r."{column}" IS NOT NULL' for column in columns)
+
+    # Add species names, drop rows with NA, build composite keys and flag validity
+    con.execute(f"""
+        CREATE TEMP TABLE classified AS
+        WITH keyed AS (
+            SELECT r.*, sp.name AS species_name,
+                   lower(r.database) || ':' || r.fromGeneId || ':' || r.taxonId AS from_key,
+                   lower(r.database) || ':' || r.toGeneId || ':' || r.taxonId AS to_key,
+                   r.rowid AS row_id
+            FROM raw_interactions AS r
+            JOIN species AS sp ON sp.taxon_id = r.taxonId
+            WHERE {not_null}
+        )
+        SELECT keyed.*,
+               from_keys.gene_key IS NOT NULL AND to_keys.gene_key IS NOT NULL AS is_valid
+        FROM keyed
+        LEFT JOIN gene_keys AS from_keys ON from_keys.gene_key = keyed.from_key
+        LEFT JOIN gene_keys AS to_keys ON to_keys.gene_key = keyed.to_key
+    """)
+
+    # Overall, per-taxon and per-database counts in one grouped aggregation
+    stats_df = con.execute("""
+        WITH grouped AS (
+            SELECT CASE
+                       WHEN grouping(c.taxonId) = 1 THEN 'overall'
+                       WHEN grouping(c.database) = 1 THEN 'taxon'
+                       ELSE 'database'
+                   END AS level,
+                   CASE WHEN grouping(c.taxonId) = 1 THEN 'all' ELSE c.taxonId END AS taxon_id,
+                   CASE WHEN grouping(c.species_name) = 1 THEN 'all' ELSE c.species_name END AS species_name,
+                   CASE WHEN grouping(c.database) = 1 THEN 'all' ELSE c.database END AS database,
+                   count(*) AS "all",
+                   count(*) FILTER (WHERE c.is_valid) AS "valid",
+                   count(*) FILTER (WHERE NOT c.is_valid) AS "invalid"
+            FROM classified AS c
+            GROUP BY GROUPING SETS ((), (c.taxonId, c.species_name), (c.taxonId, c.species_name, c.database))
+        )
+        SELECT level, taxon_id, species_name, database, interaction_type, count
+        FROM (UNPIVOT grouped ON "all", "valid", "invalid" INTO NAME interaction_type VALUE count)
+        ORDER BY level, taxon_id, database, interaction_type
+    """).df()
+
+    # Save files with same format as the pandas backend
+    base_path = subset_output_path(OUTPUT_DIR, taxa, databases)
+    base_path.mkdir(parents=True, exist_ok=True)
+    valid_output = f'{base_path}/valid_interactions.csv'
+    invalid_output = f'{base_path}/invalid_interactions.csv'
+    stats_output = f'{base_path}/interactions_stats.csv'
+
+    for is_valid, output in ((True, valid_output), (False, invalid_output)):
+        con.execute(f"""
+            COPY (
+                SELECT * EXCLUDE (row_id, is_valid) FROM classified
+                WHERE is_valid = {is_valid}
+                ORDER BY row_id
+            ) TO {_sql_string(output)} (HEADER, DELIMITER ',')
+        """)
+    stats_df.to_csv(stats_output, index=False)
+    valid_interactions = con.execute("""
+        SELECT * EXCLUDE (row_id, is_valid) FROM classified
+        WHERE is_valid
+        ORDER BY row_id
+    """).df()
+    con.close()
+
+    overall = stats_df[stats_df['level'] == 'overall'].set_index('interaction_type')['count']
+    print(f"Valid interactions: {overall.get('valid', 0)}")
+    print(f"Invalid interactions: {overall.get('invalid', 0)}")
+    print(f"\nFiles saved:")
+    print(f"Valid interactions: {valid_output}")
+    print(f"Invalid interactions: {invalid_output}")
+    print(f"Statistics: {stats_output}")
+
+    return valid_interactions
+
 if __name__ == "__main__":
-    validate_gene_interactions()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Validate extracted interactions against gene descriptions")
+    parser.add_argument('--backend', choices=['pandas', 'duckdb'], default='pandas',
+                        help="Execution engine; both write identical outputs")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="Threads for the duckdb backend (default: all cores)")
+    add_subset_arguments(parser)
+    args = parser.parse_args()
+    if args.backend == 'duckdb':
+        validate_gene_interactions_duckdb(threads=args.threads, taxa=args.taxa, databases=args.databases)
+    else:
+        validate_gene_interactions(taxa=args.taxa, databases=args.databases)
\ No newline at end of file